@@ -0,0 +1,27 @@
+import time
+from math import inf
+
+time_limit = inf
+# Part of the time limit that is kept for sending the plan to the server.
+output_reserve = 0.1
+_start_time = time.perf_counter()
+
+# Fractions of the search time after which search switches to cheaper strategies.
+GREEDY_AT = 0.5
+SUBGOALS_AT = 0.75
+
+
+def elapsed() -> float:
+    """Returns the time in seconds since the client started."""
+    return time.perf_counter() - _start_time
+
+
+def used(fraction: float = 1.0) -> bool:
+    """Returns True if the given fraction of the time available for search has been used."""
+    return elapsed() >= fraction * time_limit * (1 - output_reserve)
+
+
+def restart() -> None:
+    """Restarts the clock, e.g. for the next level in a long-running process."""
+    global _start_time
+    _start_time = time.perf_counter()
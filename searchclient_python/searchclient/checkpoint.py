@@ -0,0 +1,123 @@
+import os
+import struct
+import sys
+import time
+import zlib
+from collections.abc import Iterable
+
+from searchclient.action import Action
+from searchclient.color import Color
+from searchclient.externalbfs import StateCodec
+from searchclient.frontier import Frontier
+from searchclient.state import State
+
+_MAGIC = b"SCCP"
+_VERSION = 1
+# Magic, version, rows, columns, agents, explored states, frontier states.
+_HEADER = struct.Struct("<4sHHHHII")
+# Parent index (-1 for the root) and g of a state.
+_NODE = struct.Struct("<iI")
+_ACTIONS = list(Action)
+_COLORS = list(Color)
+_NO_COLOR = 0xFF
+
+
+def _static_data() -> bytes:
+    """The walls, goals and colors of the level, so a checkpoint is never resumed on a different level."""
+    walls = bytes(int(wall) for row in State.walls for wall in row)
+    goals = "".join(goal or " " for row in State.goals for goal in row).encode("ascii")
+    colors = bytes(
+        _NO_COLOR if color is None else _COLORS.index(color) for color in State.agent_colors + State.box_colors
+    )
+    return walls + goals + colors
+
+
+class Checkpoint:
+    def __init__(self, path: str, interval: float = 60.0) -> None:
+        """
+        Snapshots of a search in a compact binary file: the static level data, and every explored and frontier
+        state as a packed record with the index of its parent, its g and the indices of its joint action. A
+        search saves a snapshot every interval seconds and before it gives up, and can be resumed from it with
+        any strategy, since the frontier states are added to the new frontier again.
+        """
+        self.path = path
+        self.interval = interval
+        self.last_save = time.perf_counter()
+
+    def is_due(self) -> bool:
+        return time.perf_counter() - self.last_save >= self.interval
+
+    def save(self, initial_state: State, explored: Iterable[State], frontier: Frontier) -> None:
+        start = time.perf_counter()
+        codec = StateCodec(initial_state)
+        # Parents have a lower g than their children, so sorting by g writes every parent before its children.
+        # The parents of frontier states are explored, so all of them come before the frontier states.
+        explored_states = sorted(explored, key=lambda state: state.g)
+        frontier_states = frontier.states()
+        index: dict[State, int] = {}
+        compressor = zlib.compressobj()
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "wb") as file:
+            num_agents = len(initial_state.agent_rows)
+            file.write(
+                _HEADER.pack(
+                    _MAGIC,
+                    _VERSION,
+                    len(State.walls),
+                    len(State.walls[0]),
+                    num_agents,
+                    len(explored_states),
+                    len(frontier_states),
+                )
+            )
+            file.write(compressor.compress(_static_data()))
+            for state in explored_states + frontier_states:
+                parent = -1 if state.parent is None else index.get(state.parent, -1)
+                actions = [Action.NoOp] * num_agents if state.joint_action is None else state.joint_action
+                record = codec.encode(state) + _NODE.pack(parent, state.g) + bytes(map(_ACTIONS.index, actions))
+                file.write(compressor.compress(record))
+                index[state] = len(index)
+            file.write(compressor.flush())
+        os.replace(temporary_path, self.path)
+        self.last_save = time.perf_counter()
+        print(
+            f"Saved checkpoint of {len(index):,} states to {self.path} in {self.last_save - start:.3f} s.",
+            file=sys.stderr,
+            flush=True,
+        )
+
+    def load(self, initial_state: State) -> tuple[set[State], list[State]] | None:
+        """
+        Returns the explored and frontier states of the checkpoint, or None if there is no checkpoint for this
+        level and initial state.
+        """
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, "rb") as file:
+            header = file.read(_HEADER.size)
+            payload = zlib.decompress(file.read())
+        magic, version, rows, cols, num_agents, num_explored, num_frontier = _HEADER.unpack(header)
+        static_data = _static_data()
+        codec = StateCodec(initial_state)
+        if (
+            magic != _MAGIC
+            or version != _VERSION
+            or (rows, cols, num_agents) != (len(State.walls), len(State.walls[0]), len(initial_state.agent_rows))
+            or payload[: len(static_data)] != static_data
+            or payload[len(static_data) : len(static_data) + codec.size] != codec.encode(initial_state)
+        ):
+            print(f"Checkpoint {self.path} is for a different level or initial state.", file=sys.stderr, flush=True)
+            return None
+
+        states: list[State] = []
+        size = codec.size + _NODE.size + num_agents
+        for offset in range(len(static_data), len(payload), size):
+            state = codec.decode(payload[offset : offset + codec.size])
+            parent, state.g = _NODE.unpack_from(payload, offset + codec.size)
+            if parent >= 0:
+                state.parent = states[parent]
+                actions = payload[offset + codec.size + _NODE.size : offset + size]
+                state.joint_action = [_ACTIONS[action] for action in actions]
+            states.append(state)
+        print(f"Resuming from checkpoint of {len(states):,} states.", file=sys.stderr, flush=True)
+        return set(states[:num_explored]), states[num_explored : num_explored + num_frontier]
@@ -0,0 +1,212 @@
+import argparse
+import io
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from searchclient import budget, memory
+from searchclient.action import Action
+from searchclient.color import Color
+from searchclient.heuristic import Heuristic
+from searchclient.landmarks import GoalOrdering
+from searchclient.regions import RegionMap
+from searchclient.state import State
+from searchclient.symmetry import AgentSymmetry
+
+Cell = tuple[int, int]
+
+
+class Component:
+    def __init__(self, color: Color, agents: list[int], area: set[Cell]) -> None:
+        """The agents of one color within one connected area of the level, with the boxes they can move."""
+        self.color = color
+        self.agents = agents
+        self.area = area
+
+    def __repr__(self) -> str:
+        return f"{self.color.name.lower()} agents {self.agents}"
+
+
+def _areas() -> dict[Cell, int]:
+    """Labels the connected areas of free cells, ignoring boxes and agents."""
+    area_of: dict[Cell, int] = {}
+    label = 0
+    for row in range(len(State.walls)):
+        for col in range(len(State.walls[row])):
+            if State.walls[row][col] or (row, col) in area_of:
+                continue
+            label += 1
+            area_of[(row, col)] = label
+            queue = deque([(row, col)])
+            while queue:
+                cell_row, cell_col = queue.popleft()
+                for n_row, n_col in (
+                    (cell_row - 1, cell_col),
+                    (cell_row + 1, cell_col),
+                    (cell_row, cell_col - 1),
+                    (cell_row, cell_col + 1),
+                ):
+                    if (
+                        0 <= n_row < len(State.walls)
+                        and 0 <= n_col < len(State.walls[n_row])
+                        and not State.walls[n_row][n_col]
+                        and (n_row, n_col) not in area_of
+                    ):
+                        area_of[(n_row, n_col)] = label
+                        queue.append((n_row, n_col))
+    return area_of
+
+
+def color_components(initial_state: State) -> list[Component]:
+    """
+    Splits the level into components: the agents of one color that can statically reach the same area. Two
+    components only interact through the space they share, since neither can move the other's boxes.
+    """
+    area_of = _areas()
+    groups: dict[tuple[Color, int], list[int]] = {}
+    for agent in range(len(initial_state.agent_rows)):
+        area = area_of[(initial_state.agent_rows[agent], initial_state.agent_cols[agent])]
+        groups.setdefault((State.agent_colors[agent], area), []).append(agent)
+    return [
+        Component(color, agents, {cell for cell, label in area_of.items() if label == area})
+        for (color, area), agents in groups.items()
+    ]
+
+
+def _is_movable(components: list[Component], row: int, col: int, box: str) -> bool:
+    color = State.box_colors[ord(box) - ord("A")]
+    return any(component.color == color and (row, col) in component.area for component in components)
+
+
+def sub_level(initial_state: State, components: list[Component], component: Component) -> str:
+    """
+    Returns the level text of a component: its agents, renumbered from 0, and the boxes and goals of its color
+    in its area. Boxes that no agent can move become walls; the boxes and agents of other components are left
+    out, and conflicts with them are repaired after merging the plans.
+    """
+    rows = len(State.walls)
+    cols = len(State.walls[0])
+    initial = [["+" if State.walls[row][col] else " " for col in range(cols)] for row in range(rows)]
+    goal = [["+" if State.walls[row][col] else " " for col in range(cols)] for row in range(rows)]
+    letters = set()
+    for row in range(rows):
+        for col in range(cols):
+            box = initial_state.boxes[row][col]
+            if box and not _is_movable(components, row, col, box):
+                initial[row][col] = goal[row][col] = "+"
+            elif box and State.box_colors[ord(box) - ord("A")] == component.color and (row, col) in component.area:
+                initial[row][col] = box
+                letters.add(box)
+    for row in range(rows):
+        for col in range(cols):
+            letter = State.goals[row][col]
+            if "A" <= letter <= "Z" and letter in letters and (row, col) in component.area and goal[row][col] != "+":
+                goal[row][col] = letter
+    for index, agent in enumerate(component.agents):
+        initial[initial_state.agent_rows[agent]][initial_state.agent_cols[agent]] = str(index)
+        for row in range(rows):
+            for col in range(cols):
+                if State.goals[row][col] == str(agent):
+                    goal[row][col] = str(index)
+
+    entities = [str(index) for index in range(len(component.agents))] + sorted(letters)
+    colors = f"{component.color.name.lower()}: {', '.join(entities)}"
+    return "\n".join(
+        ["#domain", "hospital", "#levelname", "component", "#colors", colors, "#initial"]
+        + ["".join(line) for line in initial]
+        + ["#goal"]
+        + ["".join(line) for line in goal]
+        + ["#end", ""]
+    )
+
+
+def _solve_level(args: argparse.Namespace, level: str, time_limit: float) -> list[list[Action]] | None:
+    """Solves a level text in a worker process with the strategy and options of args."""
+    # Imported here, since the client module imports this one.
+    from searchclient.searchclient import SearchClient
+
+    memory.max_usage = args.max_memory
+    # The clock was inherited from the parent, and the parent keeps the reserve for sending the merged plan.
+    budget.restart()
+    budget.time_limit = time_limit
+    budget.output_reserve = 0
+    initial_state = SearchClient.parse_level(io.StringIO(level))
+    if args.regions:
+        Heuristic.region_map = RegionMap()
+    goal_ordering = GoalOrdering(initial_state) if args.prune_goal_order else None
+    symmetry = AgentSymmetry(initial_state) if args.symmetry else None
+    if symmetry is not None and symmetry.is_trivial():
+        symmetry = None
+    return SearchClient.find_plan(args, initial_state, goal_ordering, symmetry)
+
+
+def merge_plans(
+    initial_state: State, components: list[Component], plans: list[list[list[Action]] | None]
+) -> tuple[list[list[Action]], State]:
+    """
+    Merges the plans of the components step by step. A component whose next action cannot be executed together
+    with the actions of the components before it waits for a step. Returns the merged plan up to where every
+    plan is done or no component can go on, and the state after it.
+    """
+    num_agents = len(initial_state.agent_rows)
+    state = initial_state.detached()
+    steps = [0 for _ in components]
+    merged: list[list[Action]] = []
+    while True:
+        active = [i for i, plan in enumerate(plans) if plan is not None and steps[i] < len(plan)]
+        joint_action = [Action.NoOp] * num_agents
+        moved = []
+        for i in active:
+            candidate = joint_action[:]
+            for index, agent in enumerate(components[i].agents):
+                candidate[agent] = plans[i][steps[i]][index]
+            if all(
+                state.is_applicable(agent, candidate[agent]) for agent in components[i].agents
+            ) and not state.is_conflicting(candidate):
+                joint_action = candidate
+                moved.append(i)
+        if not moved:
+            break
+        state = state.result(joint_action)
+        merged.append(joint_action)
+        for i in moved:
+            steps[i] += 1
+    # A fresh state without parent, so a plan found from it only contains the new actions.
+    return merged, state.detached()
+
+
+def solve_components(
+    args: argparse.Namespace,
+    initial_state: State,
+    components: list[Component],
+    goal_ordering: GoalOrdering | None,
+    symmetry: AgentSymmetry | None,
+) -> list[list[Action]] | None:
+    """
+    Solves the sub-level of every component in its own process and merges the plans, letting components wait
+    where they get in each other's way. Only if the merged plan gets stuck or ends without reaching the goal,
+    a joint search for the whole level repairs the rest from that state.
+    """
+    # Imported here, since the client module imports this one.
+    from searchclient.searchclient import SearchClient
+
+    joint_args = argparse.Namespace(**{**vars(args), "decompose": False})
+    # The components do not share the checkpoint file of the whole level.
+    component_args = argparse.Namespace(**{**vars(joint_args), "checkpoint": None})
+    time_limit = budget.time_limit * (1 - budget.output_reserve) - budget.elapsed()
+    levels = [sub_level(initial_state, components, component) for component in components]
+    print(f"Solving {len(components)} components in parallel: {components}.", file=sys.stderr, flush=True)
+    with ProcessPoolExecutor(max_workers=min(len(components), os.cpu_count() or 1)) as executor:
+        plans = list(executor.map(_solve_level, [component_args] * len(levels), levels, [time_limit] * len(levels)))
+
+    for component, plan in zip(components, plans):
+        if plan is None:
+            print(f"Component {component} could not be solved on its own.", file=sys.stderr, flush=True)
+
+    merged, state = merge_plans(initial_state, components, plans)
+    if state.is_goal_state():
+        return merged
+    print(f"Merged plan is stuck after {len(merged)} steps, repairing it.", file=sys.stderr, flush=True)
+    rest = SearchClient.find_plan(joint_args, state, goal_ordering, symmetry)
+    return None if rest is None else merged + rest
@@ -0,0 +1,210 @@
+import heapq
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from collections.abc import Iterable, Iterator
+
+from searchclient import budget, memory
+from searchclient.action import Action
+from searchclient.heuristic import goal_cells, unsatisfied_goals
+from searchclient.state import State
+
+# The plan to the expanded state with the fewest unsatisfied goals, when the last search gave up.
+_best_plan: list[list[Action]] | None = None
+
+
+def best_partial_plan() -> list[list[Action]] | None:
+    return _best_plan
+
+
+class StateCodec:
+    def __init__(self, initial_state: State) -> None:
+        """
+        Packs states into fixed-size byte records: the free cell index of every agent, the free cell index of
+        every box in row-major order, and the letters of the boxes. The number of boxes never changes, so all
+        records of a level have the same size and can be stored back to back in a file.
+        """
+        self.cells = [
+            (row, col)
+            for row in range(len(State.walls))
+            for col in range(len(State.walls[row]))
+            if not State.walls[row][col]
+        ]
+        assert len(self.cells) <= 0xFFFF, "Level has too many free cells for 16-bit cell indices."
+        self.index = {cell: i for i, cell in enumerate(self.cells)}
+        self.num_agents = len(initial_state.agent_rows)
+        self.num_boxes = sum(1 for row, col in self.cells if initial_state.boxes[row][col])
+        self.struct = struct.Struct(f"<{self.num_agents + self.num_boxes}H{self.num_boxes}s")
+        self.size = self.struct.size
+
+    def encode(self, state: State) -> bytes:
+        agents = [self.index[(state.agent_rows[agent], state.agent_cols[agent])] for agent in range(self.num_agents)]
+        box_cells = []
+        letters = []
+        for i, (row, col) in enumerate(self.cells):
+            if state.boxes[row][col]:
+                box_cells.append(i)
+                letters.append(state.boxes[row][col])
+        return self.struct.pack(*agents, *box_cells, "".join(letters).encode("ascii"))
+
+    def decode(self, record: bytes) -> State:
+        values = self.struct.unpack(record)
+        agent_cells = [self.cells[i] for i in values[: self.num_agents]]
+        boxes = [["" for _ in row] for row in State.walls]
+        for i, letter in zip(values[self.num_agents : -1], values[-1].decode("ascii")):
+            row, col = self.cells[i]
+            boxes[row][col] = letter
+        return State([row for row, _ in agent_cells], [col for _, col in agent_cells], boxes)
+
+
+def _write_records(path: str, records: Iterable[bytes]) -> int:
+    count = 0
+    with open(path, "wb") as file:
+        for record in records:
+            file.write(record)
+            count += 1
+    return count
+
+
+def _read_records(path: str, size: int) -> Iterator[bytes]:
+    """Streams the records of a file through a memory-mapped view of it."""
+    if os.path.getsize(path) == 0:
+        return
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        for offset in range(0, len(view), size):
+            yield view[offset : offset + size]
+
+
+def _unique(records: Iterable[bytes]) -> Iterator[bytes]:
+    """Drops repeated records from a sorted stream."""
+    previous = None
+    for record in records:
+        if record != previous:
+            yield record
+            previous = record
+
+
+def _subtract(records: Iterable[bytes], removed: Iterable[bytes]) -> Iterator[bytes]:
+    """Yields the records of a sorted stream that are not in another sorted stream."""
+    removed = iter(removed)
+    current = next(removed, None)
+    for record in records:
+        while current is not None and current < record:
+            current = next(removed, None)
+        if record != current:
+            yield record
+
+
+def _reconstruct(codec: StateCodec, layers: list[str], record: bytes) -> list[list[Action]]:
+    """
+    Backward pass over the layer files: for the state in the last layer, finds a parent in the layer before it
+    by expanding that layer's states again, and repeats from the parent down to the initial state.
+    """
+    plan = []
+    for path in reversed(layers[:-1]):
+        for parent_record in _read_records(path, codec.size):
+            child = next(
+                (child for child in codec.decode(parent_record).get_expanded_states() if codec.encode(child) == record),
+                None,
+            )
+            if child is not None:
+                plan.append(child.joint_action)
+                record = parent_record
+                break
+    plan.reverse()
+    return plan
+
+
+def external_bfs(
+    initial_state: State, directory: str | None = None, run_size: int = 200_000
+) -> list[list[Action]] | None:
+    """
+    Breadth-first search that keeps its layers on disk instead of in memory. The children of a layer are
+    collected in sorted runs of at most run_size records, which are merged, and the states that were already
+    visited are removed by a merge with a sorted file of all previous layers (delayed duplicate detection).
+    Layers are read back through memory-mapped files, and the plan is reconstructed by a backward pass over
+    the layer files. The files are kept in a temporary directory, inside directory if it is given.
+
+    Under a time limit, the search stops once the budget.SUBGOALS_AT fraction of the time is used. When it gives
+    up, the plan to the expanded state with the fewest unsatisfied goals is kept for best_partial_plan().
+    """
+    global _best_plan
+    _best_plan = None
+    codec = StateCodec(initial_state)
+    cells = goal_cells(initial_state)
+    root = initial_state.detached()
+    if root.is_goal_state():
+        return []
+
+    with tempfile.TemporaryDirectory(prefix="searchclient-bfs-", dir=directory) as tmp:
+        layers = [os.path.join(tmp, "layer-0.bin")]
+        visited = os.path.join(tmp, "visited.bin")
+        _write_records(layers[0], [codec.encode(root)])
+        _write_records(visited, [codec.encode(root)])
+        num_visited = 1
+        # The fewest unsatisfied goals of an expanded state, with its layer and record.
+        best = (unsatisfied_goals(root, cells), 0, codec.encode(root))
+
+        def give_up() -> None:
+            global _best_plan
+            _, layer_index, record = best
+            _best_plan = _reconstruct(codec, layers[: layer_index + 1], record)
+
+        while True:
+            runs: list[str] = []
+            buffer: list[bytes] = []
+
+            def flush_run() -> None:
+                path = os.path.join(tmp, f"run-{len(runs)}.bin")
+                _write_records(path, _unique(sorted(buffer)))
+                runs.append(path)
+                buffer.clear()
+
+            for record in _read_records(layers[-1], codec.size):
+                state = codec.decode(record)
+                unsatisfied = unsatisfied_goals(state, cells)
+                if unsatisfied < best[0]:
+                    best = (unsatisfied, len(layers) - 1, record)
+                for child in state.get_expanded_states():
+                    if child.is_goal_state():
+                        plan = _reconstruct(codec, layers, record) + [child.joint_action]
+                        print(f"Found goal in layer {len(layers)}.", file=sys.stderr, flush=True)
+                        return plan
+                    buffer.append(codec.encode(child))
+                if len(buffer) >= run_size:
+                    flush_run()
+                    if memory.get_usage() > memory.max_usage:
+                        print("Maximum memory usage exceeded.", file=sys.stderr, flush=True)
+                        give_up()
+                        return None
+                if budget.used(budget.SUBGOALS_AT):
+                    print("Time limit reached.", file=sys.stderr, flush=True)
+                    give_up()
+                    return None
+            flush_run()
+
+            # Merge the runs and remove the states of the previous layers.
+            layer = os.path.join(tmp, f"layer-{len(layers)}.bin")
+            merged = _unique(heapq.merge(*(_read_records(run, codec.size) for run in runs)))
+            count = _write_records(layer, _subtract(merged, _read_records(visited, codec.size)))
+            for run in runs:
+                os.remove(run)
+            if count == 0:
+                return None
+            layers.append(layer)
+
+            merged_visited = os.path.join(tmp, "visited-new.bin")
+            num_visited = _write_records(
+                merged_visited,
+                heapq.merge(_read_records(visited, codec.size), _read_records(layer, codec.size)),
+            )
+            os.replace(merged_visited, visited)
+
+            print(
+                f"#Layer: {len(layers) - 1:4}, #States: {count:10,}, #Visited: {num_visited:10,}, "
+                f"Disk: {num_visited * codec.size / (1024 * 1024):4.2f} MB, Time: {budget.elapsed():3.3f} s",
+                file=sys.stderr,
+                flush=True,
+            )
@@ -26,6 +26,10 @@ class Frontier(ABC):
     @abstractmethod
     def get_name(self) -> str: ...
 
+    @abstractmethod
+    def states(self) -> list[State]:
+        """Returns the states in the frontier, in the order they would be added to restore it."""
+
 
 class FrontierBFS(Frontier):
     def __init__(self) -> None:
@@ -54,6 +58,9 @@ class FrontierBFS(Frontier):
     def get_name(self) -> str:
         return "breadth-first search"
 
+    def states(self) -> list[State]:
+        return list(self.queue)
+
 
 class FrontierDFS(Frontier):
     def __init__(self) -> None:
@@ -82,6 +89,9 @@ class FrontierDFS(Frontier):
     def get_name(self) -> str:
         return "depth-first search"
 
+    def states(self) -> list[State]:
+        return list(self.stack)
+
 
 class FrontierBestFirst(Frontier):
     def __init__(self, heuristic: Heuristic) -> None:
@@ -92,6 +102,12 @@ class FrontierBestFirst(Frontier):
         self.entry_finder = {}
         self.counter = count()
 
+    def set_heuristic(self, heuristic: Heuristic) -> None:
+        """Re-orders the states in the frontier by a different heuristic."""
+        self.heuristic = heuristic
+        self.queue = [(heuristic.f(state), next(self.counter), state) for state in self.set]
+        heapq.heapify(self.queue)
+        self.entry_finder = {entry[2]: entry for entry in self.queue}
 
     def add(self, state: State) -> None:
         if state in self.set:
@@ -122,3 +138,129 @@ class FrontierBestFirst(Frontier):
 
     def get_name(self) -> str:
         return f"best-first search using {self.heuristic}"
+
+    def states(self) -> list[State]:
+        return list(self.set)
+
+
+class FrontierBeam(Frontier):
+    def __init__(self, heuristic: Heuristic, width: int) -> None:
+        """
+        Beam search: the states are expanded layer by layer in order of g, and only the width best states of
+        each layer by heuristic are kept, so memory is bounded by width times the depth of the search.
+        """
+        super().__init__()
+        self.heuristic = heuristic
+        self.width = width
+        # Entries (-f, count, state) of the layers that are not expanded yet, each a max-heap on f.
+        self.layers: dict[int, list[tuple[int, int, State]]] = {}
+        # The states of the layer being expanded, best last.
+        self.current: list[State] = []
+        self.set: set[State] = set()
+        self.counter = count()
+
+    def add(self, state: State) -> None:
+        if state in self.set:
+            return
+        layer = self.layers.setdefault(state.g, [])
+        entry = (-self.heuristic.f(state), next(self.counter), state)
+        if len(layer) < self.width:
+            heapq.heappush(layer, entry)
+        elif entry[0] > layer[0][0]:
+            # Better than the worst state of the layer, which is pruned.
+            _, _, pruned = heapq.heapreplace(layer, entry)
+            self.set.remove(pruned)
+        else:
+            return
+        self.set.add(state)
+
+    def pop(self) -> State:
+        if not self.current:
+            entries = self.layers.pop(min(self.layers))
+            self.current = [state for *_, state in sorted(entries)]
+        state = self.current.pop()
+        self.set.remove(state)
+        return state
+
+    def is_empty(self) -> bool:
+        return len(self.set) == 0
+
+    def size(self) -> int:
+        return len(self.set)
+
+    def contains(self, state: State) -> bool:
+        return state in self.set
+
+    def get_name(self) -> str:
+        return f"beam search of width {self.width} using {self.heuristic}"
+
+    def states(self) -> list[State]:
+        return list(self.set)
+
+
+class FrontierFocal(Frontier):
+    def __init__(self, heuristic: Heuristic, secondary: Heuristic, w: float) -> None:
+        """
+        Focal search: OPEN is ordered by the f of heuristic, and FOCAL holds the states of OPEN with
+        f <= w * f_min, ordered by the f of the secondary heuristic. States are popped from FOCAL, so the
+        plan costs at most w times the optimal cost when heuristic is admissible, while the secondary
+        heuristic steers the search towards states that are easier to complete.
+
+        States with a larger f wait in a pending heap until f_min has grown enough to let them into FOCAL.
+        Entries of popped states are removed lazily from the heaps.
+        """
+        super().__init__()
+        self.heuristic = heuristic
+        self.secondary = secondary
+        self.w = w
+        self.open: list[tuple[int, int, State]] = []
+        self.pending: list[tuple[int, int, State]] = []
+        self.focal: list[tuple[int, int, int, State]] = []
+        # The id of the entries of every state in the frontier.
+        self.entries: dict[State, int] = {}
+        self.counter = count()
+
+    def _f_min(self) -> int:
+        while self.open and self.entries.get(self.open[0][2]) != self.open[0][1]:
+            heapq.heappop(self.open)
+        return self.open[0][0]
+
+    def _push_focal(self, f_value: int, entry_id: int, state: State) -> None:
+        heapq.heappush(self.focal, (self.secondary.f(state), f_value, entry_id, state))
+
+    def add(self, state: State) -> None:
+        if state in self.entries:
+            return
+        f_value = self.heuristic.f(state)
+        entry_id = next(self.counter)
+        self.entries[state] = entry_id
+        heapq.heappush(self.open, (f_value, entry_id, state))
+        if f_value <= self.w * self._f_min():
+            self._push_focal(f_value, entry_id, state)
+        else:
+            heapq.heappush(self.pending, (f_value, entry_id, state))
+
+    def pop(self) -> State:
+        bound = self.w * self._f_min()
+        while self.pending and self.pending[0][0] <= bound:
+            self._push_focal(*heapq.heappop(self.pending))
+        while True:
+            _, _, entry_id, state = heapq.heappop(self.focal)
+            if self.entries.get(state) == entry_id:
+                del self.entries[state]
+                return state
+
+    def is_empty(self) -> bool:
+        return len(self.entries) == 0
+
+    def size(self) -> int:
+        return len(self.entries)
+
+    def contains(self, state: State) -> bool:
+        return state in self.entries
+
+    def get_name(self) -> str:
+        return f"focal search with w={self.w} using {self.heuristic} and {self.secondary}"
+
+    def states(self) -> list[State]:
+        return list(self.entries)
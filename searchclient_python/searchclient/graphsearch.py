@@ -1,15 +1,36 @@
 import sys
 import time
+from collections.abc import Hashable
 
-from searchclient import memory
+from searchclient import budget, memory
 from searchclient.action import Action
-from searchclient.frontier import Frontier
+from searchclient.checkpoint import Checkpoint
+from searchclient.frontier import Frontier, FrontierBestFirst
+from searchclient.heuristic import HeuristicGreedy, goal_cells, unsatisfied_goals
+from searchclient.landmarks import GoalOrdering
 from searchclient.state import State
+from searchclient.symmetry import AgentSymmetry
 
 start_time = time.perf_counter()
 
+# The state with the fewest unsatisfied goals seen by the last search, used for a partial plan when time runs out.
+_best_state: State | None = None
 
-def search(initial_state: State, frontier: Frontier) -> list[list[Action]] | None:
+
+def best_partial_state() -> State | None:
+    return _best_state
+
+
+def search(
+    initial_state: State,
+    frontier: Frontier,
+    goal_ordering: GoalOrdering | None = None,
+    max_expanded: int | None = None,
+    symmetry: AgentSymmetry | None = None,
+    stop_at: float = 1.0,
+    checkpoint: Checkpoint | None = None,
+) -> list[list[Action]] | None:
+    global _best_state
     output_fixed_solution = False
 
     if output_fixed_solution:
@@ -51,19 +72,61 @@ def search(initial_state: State, frontier: Frontier) -> list[list[Action]] | Non
 
     iterations = 0
 
-    frontier.add(initial_state)
     explored: set[State] = set()
+    snapshot = None if checkpoint is None else checkpoint.load(initial_state)
+    if snapshot is None:
+        frontier.add(initial_state)
+    else:
+        explored, frontier_states = snapshot
+        for state in frontier_states:
+            frontier.add(state)
+
+    # With symmetry reduction, duplicates are detected on the canonical keys of all generated states instead.
+    # The states themselves stay concrete, so the extracted plan uses the actual agent indices.
+    generated_keys: set[Hashable] = set()
+    if symmetry is not None:
+        generated_keys.add(symmetry.key(initial_state))
+        generated_keys.update(symmetry.key(state) for state in explored)
+        generated_keys.update(symmetry.key(state) for state in frontier.states())
+
+    # Under a time limit, best-first search switches to greedy once half of the search time is used, and stops
+    # once the stop_at fraction is used. The state closest to the goal is kept for a partial plan.
+    switched_to_greedy = not isinstance(frontier, FrontierBestFirst) or isinstance(frontier.heuristic, HeuristicGreedy)
+    cells = goal_cells(initial_state)
+    _best_state = initial_state
+    best_unsatisfied = unsatisfied_goals(initial_state, cells)
 
     while True:
         iterations += 1
         if iterations % 1000 == 0:
             print_search_status(explored, frontier)
+            if checkpoint is not None and checkpoint.is_due():
+                checkpoint.save(initial_state, explored, frontier)
 
         if memory.get_usage() > memory.max_usage:
             print_search_status(explored, frontier)
             print("Maximum memory usage exceeded.", file=sys.stderr, flush=True)
+            if checkpoint is not None:
+                checkpoint.save(initial_state, explored, frontier)
             return None
 
+        if max_expanded is not None and len(explored) >= max_expanded:
+            print_search_status(explored, frontier)
+            print("Maximum number of expanded states exceeded.", file=sys.stderr, flush=True)
+            return None
+
+        if budget.used(stop_at):
+            print_search_status(explored, frontier)
+            print("Time limit reached.", file=sys.stderr, flush=True)
+            if checkpoint is not None:
+                checkpoint.save(initial_state, explored, frontier)
+            return None
+
+        if not switched_to_greedy and budget.used(budget.GREEDY_AT):
+            print("Running low on time, switching to greedy search.", file=sys.stderr, flush=True)
+            frontier.set_heuristic(HeuristicGreedy(initial_state))
+            switched_to_greedy = True
+
         if frontier.is_empty():
             return None
         
@@ -74,9 +137,21 @@ def search(initial_state: State, frontier: Frontier) -> list[list[Action]] | Non
             return state.extract_plan()
         
         explored.add(state)
+
+        unsatisfied = unsatisfied_goals(state, cells)
+        if unsatisfied < best_unsatisfied:
+            _best_state, best_unsatisfied = state, unsatisfied
         
         for child in state.get_expanded_states():
-            if child not in explored and not frontier.contains(child):
+            # Optionally prune children that fill goals in an order that cannot lead to a solution.
+            if goal_ordering is not None and goal_ordering.is_out_of_order(child):
+                continue
+            if symmetry is not None:
+                key = symmetry.key(child)
+                if key not in generated_keys:
+                    generated_keys.add(key)
+                    frontier.add(child)
+            elif child not in explored and not frontier.contains(child):
                 frontier.add(child)
        
 
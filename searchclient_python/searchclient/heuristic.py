@@ -1,13 +1,50 @@
 from abc import ABC, abstractmethod
+from typing import ClassVar
 
+from searchclient.landmarks import GoalOrdering
+from searchclient.regions import RegionMap
 from searchclient.state import State
 
+GoalCell = tuple[int, int, str]
+
+
+def goal_cells(initial_state: State) -> list[GoalCell]:
+    """Returns the box goals and the agent goals of existing agents of the current goals, with their cells."""
+    return [
+        (row, col, goal)
+        for row in range(len(State.goals))
+        for col, goal in enumerate(State.goals[row])
+        if "A" <= goal <= "Z" or ("0" <= goal <= "9" and ord(goal) - ord("0") < len(initial_state.agent_rows))
+    ]
+
+
+def unsatisfied_goals(state: State, cells: list[GoalCell]) -> int:
+    unsatisfied = 0
+    for row, col, goal in cells:
+        if "A" <= goal <= "Z":
+            unsatisfied += state.boxes[row][col] != goal
+        else:
+            agent = ord(goal) - ord("0")
+            unsatisfied += state.agent_rows[agent] != row or state.agent_cols[agent] != col
+    return unsatisfied
+
 
 class Heuristic(ABC):
+    # Shared by all heuristics of a level when set; distances then follow the walls instead of being Manhattan.
+    region_map: ClassVar[RegionMap | None] = None
+    # Set by the subgoal planner while it solves a subproblem, to add the walk of an agent to the farthest box.
+    count_approach: ClassVar[bool] = False
+
     def __init__(self, initial_state: State) -> None:
         # Here's a chance to pre-process the static parts of the level.
         pass
 
+    @staticmethod
+    def distance(from_row: int, from_col: int, to_row: int, to_col: int) -> float:
+        if Heuristic.region_map is not None:
+            return Heuristic.region_map.distance(from_row, from_col, to_row, to_col)
+        return abs(from_row - to_row) + abs(from_col - to_col)
+
     # def h(self, state: State) -> int:
     #     not_at_goal = 0
     #     for row in range(len(state.goals)):
@@ -59,7 +96,9 @@ class Heuristic(ABC):
                         box_positions[box] = []
                     box_positions[box].append((row, col))  # Store positions of each box
 
-        # Compute Manhattan distance for boxes to their goal positions
+        misplaced_boxes = []
+
+        # Compute distance for boxes to their goal positions
         for row in range(len(state.goals)):
             for col in range(len(state.goals[row])):
                 goal = state.goals[row][col]
@@ -70,16 +109,33 @@ class Heuristic(ABC):
                         # Find the closest available box
                         closest_box_idx = min(
                             range(len(box_positions[goal])),
-                            key=lambda i: abs(box_positions[goal][i][0] - row) + abs(box_positions[goal][i][1] - col)
+                            key=lambda i: self.distance(row, col, *box_positions[goal][i]),
                         )
                         closest_box = box_positions[goal].pop(closest_box_idx)  # Remove assigned box
-                        total_distance += abs(closest_box[0] - row) + abs(closest_box[1] - col)
+                        total_distance += self.distance(row, col, closest_box[0], closest_box[1])
+                        if closest_box != (row, col):
+                            misplaced_boxes.append((closest_box[0], closest_box[1], goal))
 
                 # If the goal is for an agent (0-9)
                 elif "0" <= goal <= "9":
                     agent_id = ord(goal) - ord("0")  # Convert agent char to index
                     agent_row, agent_col = state.agent_rows[agent_id], state.agent_cols[agent_id]
-                    total_distance += abs(agent_row - row) + abs(agent_col - col)
+                    total_distance += self.distance(row, col, agent_row, agent_col)
+
+        # In the subproblems of the subgoal planner, every misplaced box needs an agent of its color to walk up
+        # next to it, so count the farthest one. Other searches keep the plain distance sum.
+        if Heuristic.count_approach:
+            approach = 0
+            for box_row, box_col, box in misplaced_boxes:
+                box_color = State.box_colors[ord(box) - ord("A")]
+                distances = [
+                    self.distance(box_row, box_col, state.agent_rows[agent], state.agent_cols[agent]) - 1
+                    for agent in range(len(state.agent_rows))
+                    if agent not in State.frozen_agents and State.agent_colors[agent] == box_color
+                ]
+                if distances:
+                    approach = max(approach, min(distances))
+            total_distance += approach
 
         return total_distance
 
@@ -134,3 +190,45 @@ class HeuristicGoalCount(Heuristic):
     def __repr__(self) -> str:
         return "Goal count evaluation"
 
+
+class HeuristicLandmarks(Heuristic):
+    def __init__(self, initial_state: State, w: int = 1) -> None:
+        super().__init__(initial_state)
+        self.ordering = GoalOrdering(initial_state)
+        self.w = w
+
+    def f(self, state: State) -> int:
+        return state.g + self.w * (self.h(state) + self.ordering.landmark_count(state))
+
+    def __repr__(self) -> str:
+        return f"landmark-count({self.w}) evaluation"
+
+
+class HeuristicInteractions(Heuristic):
+    def __init__(self, initial_state: State) -> None:
+        """
+        Counts the unsatisfied goals plus the interactions that get in the way of the agents: every agent
+        next to another agent, and every agent next to a box it cannot move. Meant as the secondary heuristic
+        of focal search, which prefers states with fewer of them among the states with a near-optimal f.
+        """
+        super().__init__(initial_state)
+        self.goal_cells = goal_cells(initial_state)
+
+    def f(self, state: State) -> int:
+        unsatisfied = unsatisfied_goals(state, self.goal_cells)
+
+        positions = set(zip(state.agent_rows, state.agent_cols))
+        interactions = 0
+        for agent in range(len(state.agent_rows)):
+            row, col = state.agent_rows[agent], state.agent_cols[agent]
+            for n_row, n_col in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+                if (n_row, n_col) in positions:
+                    interactions += 1
+                elif 0 <= n_row < len(state.boxes) and 0 <= n_col < len(state.boxes[n_row]):
+                    box = state.boxes[n_row][n_col]
+                    if box and State.box_colors[ord(box) - ord("A")] != State.agent_colors[agent]:
+                        interactions += 1
+        return unsatisfied + interactions
+
+    def __repr__(self) -> str:
+        return "interaction count"
@@ -0,0 +1,118 @@
+from collections import deque
+
+from searchclient.state import State
+
+
+class GoalOrdering:
+    def __init__(self, initial_state: State) -> None:
+        """
+        Derives goal orderings from the static level layout (State.walls and State.goals).
+
+        A box goal a must be filled before a box goal b if placing a box on b cuts a off from the
+        rest of its room, e.g. a goal deep in a corridor has to be filled before the goal cells in
+        front of it. Every box goal is a landmark (it must be true at the end), and the orderings
+        tell which landmarks are accepted when they are reached.
+        """
+        # The goal letters are kept here, since State.goals may be narrowed down while solving subproblems.
+        self.goal_letters: dict[tuple[int, int], str] = {}
+        for row in range(len(State.goals)):
+            for col in range(len(State.goals[row])):
+                if "A" <= State.goals[row][col] <= "Z":
+                    self.goal_letters[(row, col)] = State.goals[row][col]
+        self.goals = list(self.goal_letters)
+
+        # predecessors[b] is the list of goals that must be filled before goal b.
+        self.predecessors: dict[tuple[int, int], list[tuple[int, int]]] = {goal: [] for goal in self.goals}
+        goal_set = set(self.goals)
+        for blocked in self.goals:
+            for cut_off in GoalOrdering._cut_off_cells(blocked):
+                if cut_off in goal_set:
+                    self.predecessors[blocked].append(cut_off)
+
+        # Goals that are already filled in the initial state are never considered out of order.
+        self.initially_satisfied = {goal for goal in self.goals if self._is_filled(initial_state, goal)}
+
+        self.layers = self._compute_layers()
+
+    def _is_filled(self, state: State, goal: tuple[int, int]) -> bool:
+        row, col = goal
+        return state.boxes[row][col] == self.goal_letters[goal]
+
+    @staticmethod
+    def _cut_off_cells(blocked: tuple[int, int]) -> set[tuple[int, int]]:
+        """
+        Returns the free cells that are separated from the largest part of their room when the
+        cell blocked is turned into a wall.
+        """
+        parts: list[set[tuple[int, int]]] = []
+        seen = {blocked}
+        for start in State.free_neighbours(*blocked):
+            if start in seen:
+                continue
+            part = {start}
+            seen.add(start)
+            queue = deque([start])
+            while queue:
+                cell = queue.popleft()
+                for neighbour in State.free_neighbours(*cell):
+                    if neighbour not in seen:
+                        seen.add(neighbour)
+                        part.add(neighbour)
+                        queue.append(neighbour)
+            parts.append(part)
+
+        if len(parts) < 2:
+            return set()
+        parts.sort(key=len, reverse=True)
+        cut_off: set[tuple[int, int]] = set()
+        for part in parts[1:]:
+            # Parts of equal size are ambiguous; neither is treated as a dead end.
+            if len(part) < len(parts[0]):
+                cut_off |= part
+        return cut_off
+
+    def _compute_layers(self) -> list[list[tuple[int, int]]]:
+        """Groups the goals into layers such that every goal comes after all of its predecessors."""
+        layers = []
+        placed: set[tuple[int, int]] = set()
+        remaining = list(self.goals)
+        while remaining:
+            layer = [goal for goal in remaining if all(p in placed for p in self.predecessors[goal])]
+            if not layer:
+                # Cyclic orderings cannot be satisfied anyway; put the rest in a final layer.
+                layer = remaining
+            layers.append(layer)
+            placed.update(layer)
+            remaining = [goal for goal in remaining if goal not in placed]
+        return layers
+
+    def _is_accepted(self, state: State, goal: tuple[int, int]) -> bool:
+        if goal in self.initially_satisfied:
+            return True
+        unfilled = [p for p in self.predecessors[goal] if not self._is_filled(state, p)]
+        # A box on a goal of its letter in front of an unfilled goal of the same letter may be passing through on
+        # its way to that goal, which is the only way to get there.
+        return not unfilled or any(self.goal_letters[p] == self.goal_letters[goal] for p in unfilled)
+
+    def is_out_of_order(self, state: State) -> bool:
+        """
+        Returns True if some goal is filled while one of the goals it blocks is still unfilled, unless the box
+        may be passing through on its way to a blocked goal of the same letter.
+        """
+        for goal in self.goals:
+            if self._is_filled(state, goal) and not self._is_accepted(state, goal):
+                return True
+        return False
+
+    def landmark_count(self, state: State) -> int:
+        """
+        Counts the landmarks that still have to be achieved. Unfilled goals count once, and goals
+        filled out of order count twice, since the box has to be moved away and brought back.
+        """
+        count = 0
+        for goal in self.goals:
+            if not self._is_filled(state, goal):
+                count += 1
+            elif not self._is_accepted(state, goal):
+                count += 2
+        return count
@@ -0,0 +1,87 @@
+import argparse
+import subprocess
+import sys
+import time
+
+from searchclient.action import Action
+from searchclient.searchclient import SearchClient
+
+
+def run(level_path: str, client_args: list[str], fail_at: set[int]) -> bool:
+    """
+    Runs the client in a subprocess and plays the server over its pipes: sends the level, checks every joint
+    action against the state model, applies it and echoes one true or false per agent. The actions at the
+    indices in fail_at are answered with false for every agent and have no effect, so the client's handling of
+    failed actions (discarding what it wrote ahead and re-planning) can be reproduced without the real server.
+    Returns True if the client reached the goal.
+    """
+    with open(level_path) as file:
+        level = file.read()
+    with open(level_path) as file:
+        state = SearchClient.parse_level(file)
+    actions = {action.name_: action for action in Action}
+
+    client = subprocess.Popen(
+        [sys.executable, "-m", "searchclient.searchclient", *client_args],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    assert client.stdin is not None and client.stdout is not None
+    print(f"Client: {client.stdout.readline().strip()}.", file=sys.stderr, flush=True)
+    client.stdin.write(level)
+    client.stdin.flush()
+
+    num_actions = 0
+    num_failed = 0
+    start = time.perf_counter()
+    for line in client.stdout:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        joint_action = [actions[name] for name in line.split("|")]
+        results = [
+            num_actions not in fail_at and state.is_applicable(agent, action)
+            for agent, action in enumerate(joint_action)
+        ]
+        if state.is_conflicting(joint_action):
+            results = [False for _ in joint_action]
+        state = state.result([action if ok else Action.NoOp for action, ok in zip(joint_action, results)])
+        num_actions += 1
+        num_failed += not all(results)
+        client.stdin.write("|".join("true" if ok else "false" for ok in results) + "\n")
+        client.stdin.flush()
+    client.wait()
+
+    solved = state.is_goal_state()
+    print(
+        f"Actions: {num_actions}, failed: {num_failed}, goal reached: {solved}, "
+        f"time: {time.perf_counter() - start:.3f} s.",
+        file=sys.stderr,
+        flush=True,
+    )
+    return solved
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Local stand-in for the server. Arguments after -- are passed on to the client."
+    )
+    parser.add_argument("level", metavar="<level>", help="The level file.")
+    parser.add_argument(
+        "--fail",
+        metavar="<N>",
+        type=int,
+        action="append",
+        default=[],
+        help="Answer the action with this index (from 0) with false for every agent. Can be repeated.",
+    )
+    # The arguments after -- are passed on to the client.
+    argv = sys.argv[1:]
+    split = argv.index("--") if "--" in argv else len(argv)
+    args = parser.parse_args(argv[:split])
+    sys.exit(0 if run(args.level, argv[split + 1 :], set(args.fail)) else 1)
+
+
+if __name__ == "__main__":
+    main()
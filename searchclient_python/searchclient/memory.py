@@ -1,13 +1,18 @@
+import os
 from math import inf
 
 import psutil
 
 max_usage = inf
-_process = psutil.Process()
+# Resolved lazily, since forked worker processes inherit the handle of their parent.
+_process: psutil.Process | None = None
 
 
 def get_usage() -> float:
     """Returns memory usage of current process in MB."""
+    global _process
+    if _process is None or _process.pid != os.getpid():
+        _process = psutil.Process()
     usage = _process.memory_info().rss / (1024 * 1024)
     assert isinstance(usage, float)
     return usage
@@ -0,0 +1,150 @@
+import sys
+
+from searchclient import budget
+from searchclient.action import Action
+from searchclient.frontier import FrontierBestFirst
+from searchclient.heuristic import HeuristicAStar
+from searchclient.state import State
+
+
+def _states(initial_state: State, plan: list[list[Action]]) -> list[State]:
+    """Returns the states visited by the plan, i.e. states[t] is the state before plan[t]."""
+    states = [initial_state.detached()]
+    for joint_action in plan:
+        states.append(states[-1].result(joint_action))
+    return states
+
+
+def _apply(state: State, joint_action: list[Action]) -> State | None:
+    """Returns the resulting state, or None if the joint action is not allowed in the state."""
+    for agent, action in enumerate(joint_action):
+        if not state.is_applicable(agent, action):
+            return None
+    if state.is_conflicting(joint_action):
+        return None
+    return state.result(joint_action)
+
+
+def remove_loops(initial_state: State, plan: list[list[Action]]) -> list[list[Action]]:
+    """Cuts out every part of the plan that returns to a state which was already visited."""
+    states = [initial_state.detached()]
+    first_visit = {states[0]: 0}
+    new_plan: list[list[Action]] = []
+    for joint_action in plan:
+        state = states[-1].result(joint_action)
+        if state in first_visit:
+            index = first_visit[state]
+            for removed in states[index + 1 :]:
+                del first_visit[removed]
+            del states[index + 1 :]
+            del new_plan[index:]
+        else:
+            first_visit[state] = len(states)
+            states.append(state)
+            new_plan.append(joint_action)
+    return new_plan
+
+
+def parallelize(initial_state: State, plan: list[list[Action]], max_shift: int = 200) -> list[list[Action]]:
+    """
+    Moves every action as many steps earlier as possible, into steps where its agent is idle, and drops
+    steps where every agent is idle. An action is only moved past a step if the joint actions stay
+    applicable and non-conflicting and the state after the two steps is unchanged, so the rest of the plan
+    stays valid.
+    """
+    plan = [joint_action[:] for joint_action in plan]
+    states = _states(initial_state, plan)
+    for t in range(1, len(plan)):
+        for agent in range(len(plan[t])):
+            k = t
+            while k > 0 and t - k < max_shift and plan[k][agent] is not Action.NoOp:
+                if plan[k - 1][agent] is not Action.NoOp:
+                    break
+                earlier = plan[k - 1][:]
+                later = plan[k][:]
+                earlier[agent], later[agent] = later[agent], Action.NoOp
+                middle = _apply(states[k - 1], earlier)
+                if middle is None:
+                    break
+                end = _apply(middle, later)
+                if end is None or end != states[k + 1]:
+                    break
+                plan[k - 1], plan[k] = earlier, later
+                states[k] = middle
+                k -= 1
+    return [joint_action for joint_action in plan if any(action is not Action.NoOp for action in joint_action)]
+
+
+def _shortest_path(
+    start: State, target: State, agents: set[int], max_length: int, max_expanded: int
+) -> list[list[Action]] | None:
+    """
+    A* from start to exactly the target state, only moving the given agents and only looking for paths
+    shorter than max_length.
+    """
+    saved_goals = State.goals
+    goals = [["" for _ in row] for row in State.walls]
+    for row in range(len(target.boxes)):
+        for col in range(len(target.boxes[row])):
+            goals[row][col] = target.boxes[row][col]
+    for agent in range(len(target.agent_rows)):
+        goals[target.agent_rows[agent]][target.agent_cols[agent]] = chr(agent + ord("0"))
+    State.goals = goals
+    State.frozen_agents = frozenset(range(len(start.agent_rows))) - agents
+
+    try:
+        root = start.detached()
+        frontier = FrontierBestFirst(HeuristicAStar(root))
+        frontier.add(root)
+        explored: set[State] = set()
+        while not frontier.is_empty() and len(explored) < max_expanded:
+            state = frontier.pop()
+            if state.is_goal_state():
+                return state.extract_plan()
+            explored.add(state)
+            for child in state.get_expanded_states():
+                if child.g < max_length and child not in explored and not frontier.contains(child):
+                    frontier.add(child)
+        return None
+    finally:
+        State.goals = saved_goals
+        State.frozen_agents = frozenset()
+
+
+def replan_windows(
+    initial_state: State, plan: list[list[Action]], window: int = 10, max_expanded: int = 200
+) -> list[list[Action]]:
+    """
+    Replaces windows of the plan by shorter paths between the same two states, where A* finds one. Windows
+    overlap by three quarters of their length, so detours crossing a window border are found as well.
+    """
+    plan = plan[:]
+    states = _states(initial_state, plan)
+    t = 0
+    while t < len(plan) - 1 and not budget.used():
+        end = min(t + window, len(plan))
+        # Agents that are idle throughout the window stay where they are.
+        agents = {
+            agent
+            for joint_action in plan[t:end]
+            for agent, action in enumerate(joint_action)
+            if action is not Action.NoOp
+        }
+        shortcut = _shortest_path(states[t], states[end], agents, end - t, max_expanded)
+        if shortcut is not None:
+            # The state at the end of the window is unchanged, so only the states within it are replaced.
+            shortcut_states = _states(states[t], shortcut)
+            plan[t:end] = shortcut
+            states[t : end + 1] = shortcut_states
+        t += max(1, window // 4)
+    return plan
+
+
+def optimize_plan(initial_state: State, plan: list[list[Action]]) -> list[list[Action]]:
+    """Shortens a plan by removing loops, re-planning short windows with A*, and parallelizing the actions."""
+    length = len(plan)
+    plan = remove_loops(initial_state, plan)
+    plan = replan_windows(initial_state, plan)
+    plan = parallelize(initial_state, plan)
+    print(f"Optimized plan from {length} to {len(plan)} steps.", file=sys.stderr, flush=True)
+    return plan
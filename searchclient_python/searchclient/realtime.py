@@ -0,0 +1,161 @@
+import heapq
+import sys
+from itertools import count
+from math import inf
+
+from searchclient import budget, memory
+from searchclient.action import Action
+from searchclient.heuristic import Heuristic
+from searchclient.landmarks import GoalOrdering
+from searchclient.state import State
+from searchclient.transmitter import PlanTransmitter, apply_responses
+
+
+class RealTimeSearch:
+    def __init__(self, heuristic: Heuristic, lookahead: int = 1000, goal_ordering: GoalOrdering | None = None) -> None:
+        """
+        Real-time search in the style of LSS-LRTA*: from the current state, a bounded A* lookahead is run until
+        it has generated lookahead states, the h-values of the expanded states are raised to what the lookahead
+        learned about them, and one joint action towards the most promising frontier state is committed.
+        Learned h-values are kept in a table across steps, so the agents do not get stuck in loops.
+
+        The lookahead is bounded by generated rather than expanded states, since a single expansion of a
+        state with many agents generates hundreds of children, and the time per step should stay bounded.
+        """
+        self.heuristic = heuristic
+        self.lookahead = lookahead
+        self.goal_ordering = goal_ordering
+        self.learned: dict[State, float] = {}
+        # Heuristic values of the states generated by the current lookahead.
+        self.estimates: dict[State, float] = {}
+        self.counter = count()
+
+    def h(self, state: State) -> float:
+        learned = self.learned.get(state)
+        if learned is not None:
+            return learned
+        estimate = self.estimates.get(state)
+        if estimate is None:
+            estimate = self.estimates[state] = self.heuristic.h(state)
+        return estimate
+
+    def _expand(self, state: State) -> list[State]:
+        children = state.get_expanded_states()
+        if self.goal_ordering is not None:
+            children = [child for child in children if not self.goal_ordering.is_out_of_order(child)]
+        return children
+
+    def _look_ahead(self, root: State) -> tuple[list[list[Action]] | None, dict[State, list[State]], list[State]]:
+        """
+        A* from root until lookahead states are generated, always expanding the root. Returns the plan if a goal state was reached, the
+        children of every expanded state, and the states left on the frontier.
+        """
+        queue = [(self.h(root), next(self.counter), root)]
+        generated = {root}
+        expanded: dict[State, list[State]] = {}
+        while queue and (not expanded or len(generated) < self.lookahead):
+            _, _, state = heapq.heappop(queue)
+            if state.is_goal_state():
+                return state.extract_plan(), expanded, []
+            children = self._expand(state)
+            expanded[state] = children
+            for child in children:
+                if child not in generated:
+                    generated.add(child)
+                    heapq.heappush(queue, (child.g + self.h(child), next(self.counter), child))
+        return None, expanded, [state for *_, state in queue]
+
+    def _learn(self, expanded: dict[State, list[State]], frontier: list[State]) -> None:
+        """Dijkstra backwards from the frontier, setting h of every expanded state to its distance to the frontier."""
+        predecessors: dict[State, list[State]] = {}
+        for state, children in expanded.items():
+            for child in children:
+                predecessors.setdefault(child, []).append(state)
+        for state in expanded:
+            self.learned[state] = inf
+
+        queue = [(self.h(state), next(self.counter), state) for state in frontier]
+        heapq.heapify(queue)
+        while queue:
+            h, _, state = heapq.heappop(queue)
+            if h > self.h(state):
+                continue
+            for predecessor in predecessors.get(state, []):
+                if predecessor in expanded and self.learned[predecessor] > h + 1:
+                    self.learned[predecessor] = h + 1
+                    heapq.heappush(queue, (h + 1, next(self.counter), predecessor))
+
+    def next_actions(self, state: State) -> list[list[Action]] | None:
+        """
+        Returns the joint actions to commit from the state: the whole plan if the lookahead reached a goal,
+        otherwise the single joint action towards the child with the lowest learned h. Returns None if no
+        goal is reachable from the state.
+        """
+        root = state.detached()
+        self.estimates.clear()
+        plan, expanded, frontier = self._look_ahead(root)
+        if plan is not None:
+            return plan
+        self._learn(expanded, frontier)
+        children = expanded.get(root, [])
+        if not children or self.h(root) == inf:
+            return None
+        best = min(children, key=self.h)
+        return [best.joint_action]
+
+    def run(self, initial_state: State, transmitter: PlanTransmitter) -> bool:
+        """
+        Repeatedly commits joint actions and submits them to the server while planning the next ones. If the
+        server reports a failed action, search continues from the state the server is actually in. Returns
+        True if the goal was reached.
+        """
+        # The joint actions the server executed or will execute, with failed actions replaced by NoOp.
+        committed: list[list[Action]] = []
+        state = initial_state.detached()
+        steps = 0
+        while True:
+            if state.is_goal_state():
+                # One of the last actions may still fail on the server.
+                transmitter.wait()
+                if not transmitter.failed.is_set():
+                    return True
+
+            if transmitter.failed.is_set():
+                transmitter.wait()
+                executed = committed[: len(transmitter.responses)]
+                state = apply_responses(initial_state, executed, transmitter.responses)
+                committed = [
+                    [action if ok else Action.NoOp for action, ok in zip(joint_action, response)]
+                    for joint_action, response in zip(executed, transmitter.responses)
+                ]
+                if transmitter.server_closed:
+                    print("Server closed the connection.", file=sys.stderr, flush=True)
+                    return False
+                print(f"Action failed after {len(committed)} steps, continuing.", file=sys.stderr, flush=True)
+                transmitter.failed.clear()
+                continue
+
+            if budget.used():
+                print("Time limit reached.", file=sys.stderr, flush=True)
+                return False
+            if memory.get_usage() > memory.max_usage:
+                print("Maximum memory usage exceeded.", file=sys.stderr, flush=True)
+                return False
+
+            actions = self.next_actions(state)
+            if actions is None:
+                print("Real-time search is stuck in a dead end.", file=sys.stderr, flush=True)
+                return False
+            for joint_action in actions:
+                transmitter.submit(joint_action)
+                committed.append(joint_action)
+                state = state.result(joint_action)
+            state = state.detached()
+
+            steps += 1
+            if steps % 100 == 0:
+                print(
+                    f"#Committed: {len(committed):8,}, h: {self.h(state)}, #Learned: {len(self.learned):8,}",
+                    file=sys.stderr,
+                    flush=True,
+                )
@@ -0,0 +1,182 @@
+import heapq
+from collections import deque
+from functools import lru_cache
+from math import inf
+
+from searchclient.state import State
+
+Cell = tuple[int, int]
+
+
+class RegionMap:
+    def __init__(self) -> None:
+        """
+        Partitions the free cells of State.walls into regions (rooms) separated by chokepoints (doors and
+        corridor cells), and builds an abstract graph over the chokepoints with cached distances through
+        the regions.
+
+        Chokepoints are cut cells of width one: removing one disconnects its two sides. Every path between
+        two regions therefore passes through chokepoints, which makes the hierarchical distances exact
+        (ignoring boxes and agents), while only needing BFS within single regions.
+        """
+        self.free: set[Cell] = {
+            (row, col)
+            for row in range(len(State.walls))
+            for col in range(len(State.walls[row]))
+            if not State.walls[row][col]
+        }
+        self.chokepoints = {cell for cell in self._articulation_points() if self._is_narrow(cell)}
+
+        # region_of[cell] is the region of a non-chokepoint cell; chokepoints are not part of any region.
+        self.region_of: dict[Cell, int] = {}
+        self.regions: list[set[Cell]] = []
+        for start in self.free:
+            if start in self.chokepoints or start in self.region_of:
+                continue
+            region = {start}
+            self.region_of[start] = len(self.regions)
+            queue = deque([start])
+            while queue:
+                cell = queue.popleft()
+                for neighbour in State.free_neighbours(*cell):
+                    if neighbour not in self.chokepoints and neighbour not in self.region_of:
+                        self.region_of[neighbour] = len(self.regions)
+                        region.add(neighbour)
+                        queue.append(neighbour)
+            self.regions.append(region)
+
+        # The chokepoints bordering each region are its portals in the abstract graph.
+        self.portals: list[set[Cell]] = [set() for _ in self.regions]
+        for chokepoint in self.chokepoints:
+            for neighbour in State.free_neighbours(*chokepoint):
+                if neighbour in self.region_of:
+                    self.portals[self.region_of[neighbour]].add(chokepoint)
+
+        # Abstract graph: adjacent chokepoints, and chokepoints connected through a region.
+        self.edges: dict[Cell, dict[Cell, int]] = {chokepoint: {} for chokepoint in self.chokepoints}
+        for chokepoint in self.chokepoints:
+            for neighbour in State.free_neighbours(*chokepoint):
+                if neighbour in self.chokepoints:
+                    self.edges[chokepoint][neighbour] = 1
+        for region, portals in enumerate(self.portals):
+            for portal in portals:
+                distances = self._region_distances(portal, region)
+                for other in portals:
+                    if other != portal and other in distances:
+                        self.edges[portal][other] = min(self.edges[portal].get(other, inf), distances[other])
+
+    def _is_narrow(self, cell: Cell) -> bool:
+        neighbours = State.free_neighbours(*cell)
+        if len(neighbours) != 2:
+            return False
+        (row_1, col_1), (row_2, col_2) = neighbours
+        return row_1 == row_2 or col_1 == col_2
+
+    def _articulation_points(self) -> set[Cell]:
+        # Iterative Tarjan, since recursion is too deep for large maps.
+        discovery: dict[Cell, int] = {}
+        low: dict[Cell, int] = {}
+        points: set[Cell] = set()
+        time = 0
+        for root in self.free:
+            if root in discovery:
+                continue
+            discovery[root] = low[root] = time
+            time += 1
+            root_children = 0
+            stack = [(root, None, iter(State.free_neighbours(*root)))]
+            while stack:
+                cell, parent, neighbours = stack[-1]
+                advanced = False
+                for neighbour in neighbours:
+                    if neighbour == parent:
+                        continue
+                    if neighbour in discovery:
+                        low[cell] = min(low[cell], discovery[neighbour])
+                    else:
+                        discovery[neighbour] = low[neighbour] = time
+                        time += 1
+                        stack.append((neighbour, cell, iter(State.free_neighbours(*neighbour))))
+                        advanced = True
+                        break
+                if advanced:
+                    continue
+                stack.pop()
+                if parent is not None:
+                    low[parent] = min(low[parent], low[cell])
+                    if parent == root:
+                        root_children += 1
+                    elif low[cell] >= discovery[parent]:
+                        points.add(parent)
+            if root_children > 1:
+                points.add(root)
+        return points
+
+    def _region_distances(self, source: Cell, region: int) -> dict[Cell, int]:
+        """BFS from source through the cells of region, also reaching (but not passing) its portals."""
+        distances = {source: 0}
+        queue = deque([source])
+        while queue:
+            cell = queue.popleft()
+            if cell in self.chokepoints and cell != source:
+                continue
+            for neighbour in State.free_neighbours(*cell):
+                if neighbour in distances:
+                    continue
+                if self.region_of.get(neighbour) == region or neighbour in self.portals[region]:
+                    distances[neighbour] = distances[cell] + 1
+                    queue.append(neighbour)
+        return distances
+
+    @lru_cache(maxsize=4096)  # noqa: B019
+    def _cell_distances(self, cell: Cell) -> dict[Cell, int]:
+        return self._region_distances(cell, self.region_of[cell])
+
+    @lru_cache(maxsize=4096)  # noqa: B019
+    def _chokepoint_distances(self, source: Cell) -> dict[Cell, int]:
+        """Dijkstra over the abstract graph from a chokepoint to all other chokepoints."""
+        distances = {source: 0}
+        queue = [(0, source)]
+        while queue:
+            distance, chokepoint = heapq.heappop(queue)
+            if distance > distances[chokepoint]:
+                continue
+            for neighbour, weight in self.edges[chokepoint].items():
+                if distance + weight < distances.get(neighbour, inf):
+                    distances[neighbour] = distance + weight
+                    heapq.heappush(queue, (distance + weight, neighbour))
+        return distances
+
+    def _exits(self, cell: Cell) -> list[tuple[Cell, int]]:
+        """Returns the chokepoints through which a cell can be left, with their distances to the cell."""
+        if cell in self.chokepoints:
+            return [(cell, 0)]
+        distances = self._cell_distances(cell)
+        return [(portal, distances[portal]) for portal in self.portals[self.region_of[cell]] if portal in distances]
+
+    def distance(self, from_row: int, from_col: int, to_row: int, to_col: int) -> float:
+        """
+        Returns the length of the shortest path between two free cells, ignoring boxes and agents, or inf if
+        they are not connected. Results are cached per source cell, so pass the static end (e.g. a goal)
+        as the source where possible.
+        """
+        source, target = (from_row, from_col), (to_row, to_col)
+        if source == target:
+            return 0
+        if source not in self.free or target not in self.free:
+            return inf
+
+        if source not in self.chokepoints and self.region_of[source] == self.region_of.get(target):
+            # Leaving the region and coming back through the same chokepoint is never shorter.
+            return self._cell_distances(source).get(target, inf)
+
+        best = inf
+        target_exits = self._exits(target)
+        for source_exit, source_distance in self._exits(source):
+            exit_distances = self._chokepoint_distances(source_exit)
+            for target_exit, target_distance in target_exits:
+                best = min(best, source_distance + exit_distances.get(target_exit, inf) + target_distance)
+        return best
+
+    def __repr__(self) -> str:
+        return f"{len(self.regions)} regions, {len(self.chokepoints)} chokepoints"
@@ -1,14 +1,60 @@
 import argparse
 import sys
 import time
+from collections.abc import Callable
+from math import inf
 from typing import TextIO
 
-from searchclient import memory
+from searchclient import budget, memory
+from searchclient.action import Action
+from searchclient.checkpoint import Checkpoint
 from searchclient.color import Color
-from searchclient.frontier import Frontier, FrontierBestFirst, FrontierBFS, FrontierDFS
-from searchclient.graphsearch import search
-from searchclient.heuristic import HeuristicAStar, HeuristicGreedy, HeuristicWeightedAStar
+from searchclient.decomposition import color_components, solve_components
+from searchclient.externalbfs import best_partial_plan, external_bfs
+from searchclient.frontier import (
+    Frontier,
+    FrontierBeam,
+    FrontierBestFirst,
+    FrontierBFS,
+    FrontierDFS,
+    FrontierFocal,
+)
+from searchclient.graphsearch import best_partial_state, search
+from searchclient.heuristic import (
+    Heuristic,
+    HeuristicAStar,
+    HeuristicGreedy,
+    HeuristicInteractions,
+    HeuristicLandmarks,
+    HeuristicWeightedAStar,
+)
+from searchclient.landmarks import GoalOrdering
+from searchclient.postprocess import optimize_plan
+from searchclient.realtime import RealTimeSearch
+from searchclient.regions import RegionMap
 from searchclient.state import State
+from searchclient.subgoals import search_subgoals
+from searchclient.symmetry import AgentSymmetry
+from searchclient.transmitter import PlanTransmitter, apply_responses
+
+
+def _focal_weight(value: str) -> float:
+    # With W < 1, no state of OPEN would be within the focal bound, so FOCAL would stay empty.
+    w = float(value)
+    if w < 1:
+        raise argparse.ArgumentTypeError(f"focal weight must be at least 1, got {value}")
+    return w
+
+
+def _int_at_least(minimum: int) -> Callable[[str], int]:
+    def parse(value: str) -> int:
+        number = int(value)
+        if number < minimum:
+            raise argparse.ArgumentTypeError(f"must be at least {minimum}, got {value}")
+        return number
+
+    parse.__name__ = "int"
+    return parse
 
 
 class SearchClient:
@@ -102,6 +148,101 @@ class SearchClient:
             flush=True,
         )
 
+    @staticmethod
+    def make_frontier(args: argparse.Namespace, initial_state: State) -> Frontier:
+        if args.dfs:
+            return FrontierDFS()
+        if args.astar:
+            return FrontierBestFirst(HeuristicAStar(initial_state))
+        if args.wastar is not False:
+            return FrontierBestFirst(HeuristicWeightedAStar(initial_state, args.wastar))
+        if args.greedy:
+            return FrontierBestFirst(HeuristicGreedy(initial_state))
+        if args.landmarks is not False:
+            return FrontierBestFirst(HeuristicLandmarks(initial_state, args.landmarks))
+        if args.beam is not False:
+            return FrontierBeam(HeuristicGreedy(initial_state), args.beam)
+        if args.focal is not False:
+            return FrontierFocal(HeuristicAStar(initial_state), HeuristicInteractions(initial_state), args.focal)
+        return FrontierBFS()
+
+    @staticmethod
+    def continue_with_subgoals(
+        initial_state: State,
+        prefix: list[list[Action]],
+        goal_ordering: GoalOrdering | None,
+        symmetry: AgentSymmetry | None,
+    ) -> list[list[Action]]:
+        """Continues the prefix of a search that ran low on time with greedy subgoal search, which is much cheaper."""
+        print("Running low on time, switching to greedy subgoal search.", file=sys.stderr, flush=True)
+        state = initial_state
+        for joint_action in prefix:
+            state = state.result(joint_action)
+        rest = search_subgoals(
+            state.detached(), lambda state: FrontierBestFirst(HeuristicGreedy(state)), goal_ordering, symmetry
+        )
+        return prefix if rest is None else prefix + rest
+
+    @staticmethod
+    def find_plan(
+        args: argparse.Namespace,
+        initial_state: State,
+        goal_ordering: GoalOrdering | None,
+        symmetry: AgentSymmetry | None,
+    ) -> list[list[Action]] | None:
+        if args.decompose:
+            components = color_components(initial_state)
+            if len(components) > 1:
+                return solve_components(args, initial_state, components, goal_ordering, symmetry)
+
+        frontier = SearchClient.make_frontier(args, initial_state)
+        name = "external-memory breadth-first search" if args.extbfs else frontier.get_name()
+        print(f"Starting {name}.", file=sys.stderr, flush=True)
+        if args.extbfs:
+            plan = external_bfs(initial_state, args.extbfs_dir)
+            prefix = best_partial_plan()
+            if plan is None and prefix is not None and budget.used(budget.SUBGOALS_AT):
+                plan = SearchClient.continue_with_subgoals(initial_state, prefix, goal_ordering, symmetry)
+            elif plan is None and prefix is not None and budget.time_limit < inf:
+                print("No solution found, returning a partial plan.", file=sys.stderr, flush=True)
+                plan = prefix
+        elif args.subgoals:
+            plan = search_subgoals(
+                initial_state, lambda state: SearchClient.make_frontier(args, state), goal_ordering, symmetry
+            )
+        else:
+            checkpoint = None if args.checkpoint is None else Checkpoint(args.checkpoint, args.checkpoint_interval)
+            plan = search(
+                initial_state,
+                frontier,
+                goal_ordering,
+                symmetry=symmetry,
+                stop_at=budget.SUBGOALS_AT,
+                checkpoint=checkpoint,
+            )
+            # A failed beam search may have pruned every way to the goal, so retry with a wider beam.
+            for _ in range(args.beam_restarts):
+                if plan is not None or not isinstance(frontier, FrontierBeam) or budget.used(budget.SUBGOALS_AT):
+                    break
+                frontier = FrontierBeam(frontier.heuristic, frontier.width * args.beam_growth)
+                print(f"Beam search failed, restarting with width {frontier.width}.", file=sys.stderr, flush=True)
+                plan = search(initial_state, frontier, goal_ordering, symmetry=symmetry, stop_at=budget.SUBGOALS_AT)
+            if plan is None and budget.used(budget.SUBGOALS_AT):
+                prefix = best_partial_state().extract_plan()
+                plan = SearchClient.continue_with_subgoals(initial_state, prefix, goal_ordering, symmetry)
+            if plan is None and budget.time_limit < inf:
+                # Under a time limit, a partial plan is better than none. Subgoal search returns its own partial
+                # plans, since its best state is rooted in the middle of the level.
+                print("No solution found, returning a partial plan.", file=sys.stderr, flush=True)
+                best_state = best_partial_state()
+                plan = [] if best_state is None else best_state.extract_plan()
+
+        if plan is not None:
+            print(f"Found solution of length {len(plan)}.", file=sys.stderr, flush=True)
+            if args.optimize_plan and not budget.used(budget.SUBGOALS_AT):
+                plan = optimize_plan(initial_state, plan)
+        return plan
+
     @staticmethod
     def main(args: argparse.Namespace) -> None:
         # Use stderr to print to the console.
@@ -123,76 +264,273 @@ class SearchClient:
             server_messages.reconfigure(encoding="ASCII")
         initial_state = SearchClient.parse_level(server_messages)
 
-        # Select search strategy.
-        frontier: Frontier
-        if args.bfs:
-            frontier = FrontierBFS()
-        elif args.dfs:
-            frontier = FrontierDFS()
-        elif args.astar:
-            frontier = FrontierBestFirst(HeuristicAStar(initial_state))
-        elif args.wastar is not False:
-            frontier = FrontierBestFirst(HeuristicWeightedAStar(initial_state, args.wastar))
-        elif args.greedy:
-            frontier = FrontierBestFirst(HeuristicGreedy(initial_state))
-        else:
-            # Default to BFS search.
-            frontier = FrontierBFS()
+        if args.regions:
+            Heuristic.region_map = RegionMap()
+            print(f"Decomposed level into {Heuristic.region_map}.", file=sys.stderr, flush=True)
+
+        strategies = [
+            args.bfs,
+            args.dfs,
+            args.astar,
+            args.wastar is not False,
+            args.greedy,
+            args.landmarks is not False,
+            args.extbfs,
+            args.beam is not False,
+            args.focal is not False,
+        ]
+        if not any(strategies):
+            print(
+                "Defaulting to BFS search. Use arguments -bfs, -dfs, -astar, -wastar, -greedy, -landmarks, -extbfs,"
+                " -beam, or -focal to set the search strategy.",
+                file=sys.stderr,
+                flush=True,
+            )
+
+        goal_ordering = GoalOrdering(initial_state) if args.prune_goal_order else None
+
+        symmetry = AgentSymmetry(initial_state) if args.symmetry else None
+        if symmetry is not None and symmetry.is_trivial():
+            # Without interchangeable agents, the canonical keys only cost time.
+            print("No interchangeable agents, ignoring --symmetry.", file=sys.stderr, flush=True)
+            symmetry = None
+        if symmetry is not None:
+            print(f"Using {symmetry}.", file=sys.stderr, flush=True)
+
+        if args.realtime is not None:
+            # Plan and act at the same time: actions are sent as soon as they are committed.
+            frontier = SearchClient.make_frontier(args, initial_state)
+            heuristic = HeuristicAStar(initial_state)
+            if isinstance(frontier, FrontierBestFirst):
+                heuristic = frontier.heuristic
             print(
-                "Defaulting to BFS search. Use arguments -bfs, -dfs, -astar, -wastar, or -greedy to set the search"
-                " strategy.",
+                f"Starting real-time search with lookahead {args.realtime} using {heuristic}.",
                 file=sys.stderr,
                 flush=True,
             )
+            transmitter = PlanTransmitter(sys.stdout, server_messages, batch_size=1)
+            solved = RealTimeSearch(heuristic, args.realtime, goal_ordering).run(initial_state, transmitter)
+            transmitter.close()
+            if not solved:
+                print("Unable to solve level.", file=sys.stderr, flush=True)
+            sys.exit(0)
+
+        plan = SearchClient.find_plan(args, initial_state, goal_ordering, symmetry)
 
-        # Search for a plan.
-        print(f"Starting {frontier.get_name()}.", file=sys.stderr, flush=True)
-        plan = search(initial_state, frontier)
+        # Send plan to server. If an action fails, re-plan from the state the server is actually in.
+        transmitter = PlanTransmitter(sys.stdout, server_messages)
+        state = initial_state
+        replans = 0
+        while plan is not None:
+            responses = transmitter.send(plan)
+            if len(responses) == len(plan) and all(all(response) for response in responses):
+                break
+            if transmitter.server_closed:
+                print("Server closed the connection.", file=sys.stderr, flush=True)
+                break
+            if replans == args.max_replans or budget.used():
+                print("Plan failed, giving up.", file=sys.stderr, flush=True)
+                break
+            replans += 1
+            print(f"Plan failed after {len(responses)} actions, re-planning.", file=sys.stderr, flush=True)
+            state = apply_responses(state, plan, responses)
+            plan = SearchClient.find_plan(args, state, goal_ordering, symmetry)
+        transmitter.close()
 
-        # Print plan to server.
         if plan is None:
             print("Unable to solve level.", file=sys.stderr, flush=True)
             sys.exit(0)
-        else:
-            print(f"Found solution of length {len(plan)}.", file=sys.stderr, flush=True)
 
-            for joint_action in plan:
-                print("|".join(a.name_ + "@" + a.name_ for a in joint_action), flush=True)
-                # We must read the server's response to not fill up the stdin buffer and block the server.
-                _response = server_messages.readline()
+    @staticmethod
+    def build_parser() -> argparse.ArgumentParser:
+        """Returns the parser for the program arguments, which the solver service also uses for its jobs."""
+        parser = argparse.ArgumentParser(description="Simple client based on state-space graph search.")
+        parser.add_argument(
+            "--max-memory",
+            metavar="<MB>",
+            type=float,
+            default=2048.0,
+            help="The maximum memory usage allowed in MB (soft limit, default 2048).",
+        )
+
+        strategy_group = parser.add_mutually_exclusive_group()
+        strategy_group.add_argument("-bfs", action="store_true", dest="bfs", help="Use the BFS strategy.")
+        strategy_group.add_argument("-dfs", action="store_true", dest="dfs", help="Use the DFS strategy.")
+        strategy_group.add_argument("-astar", action="store_true", dest="astar", help="Use the A* strategy.")
+        strategy_group.add_argument(
+            "-wastar",
+            action="store",
+            dest="wastar",
+            nargs="?",
+            type=int,
+            default=False,
+            const=5,
+            help="Use the WA* strategy.",
+        )
+        strategy_group.add_argument("-greedy", action="store_true", dest="greedy", help="Use the Greedy strategy.")
+        strategy_group.add_argument(
+            "-landmarks",
+            action="store",
+            dest="landmarks",
+            nargs="?",
+            type=int,
+            default=False,
+            const=1,
+            help="Use the WA* strategy with the landmark-count heuristic.",
+        )
+        strategy_group.add_argument(
+            "-extbfs",
+            action="store_true",
+            dest="extbfs",
+            help="Use BFS with the layers and duplicate detection on disk instead of in memory.",
+        )
+        strategy_group.add_argument(
+            "-beam",
+            action="store",
+            dest="beam",
+            nargs="?",
+            type=_int_at_least(1),
+            default=False,
+            const=100,
+            help="Use beam search with the greedy heuristic, keeping the K best states per depth (default 100).",
+        )
+        strategy_group.add_argument(
+            "-focal",
+            action="store",
+            dest="focal",
+            nargs="?",
+            type=_focal_weight,
+            default=False,
+            const=1.5,
+            help="Use focal search, expanding the states with f <= W * f_min that have the fewest unsatisfied goals and"
+            " agent interactions (default W 1.5).",
+        )
+        parser.add_argument(
+            "--beam-growth",
+            metavar="<F>",
+            dest="beam_growth",
+            # A factor of 1 would restart with the same width.
+            type=_int_at_least(2),
+            default=4,
+            help="The factor by which the beam is widened when beam search fails (default 4).",
+        )
+        parser.add_argument(
+            "--beam-restarts",
+            metavar="<N>",
+            dest="beam_restarts",
+            type=_int_at_least(0),
+            default=3,
+            help="The number of times beam search is restarted with a wider beam (default 3).",
+        )
+        parser.add_argument(
+            "--extbfs-dir",
+            metavar="<dir>",
+            dest="extbfs_dir",
+            default=None,
+            help="The directory for the layer files of -extbfs (default: the system's temporary directory).",
+        )
+
+        parser.add_argument(
+            "--prune-goal-order",
+            action="store_true",
+            dest="prune_goal_order",
+            help="Prune states that fill goals in an order that blocks other goals.",
+        )
+
+        parser.add_argument(
+            "--subgoals",
+            action="store_true",
+            dest="subgoals",
+            help="Solve the level one goal at a time, falling back to a joint search if a subgoal fails.",
+        )
+
+        parser.add_argument(
+            "--decompose",
+            action="store_true",
+            dest="decompose",
+            help="Solve the agents of every color in their own process, and repair conflicts of the merged plan with a"
+            " joint search.",
+        )
+
+        parser.add_argument(
+            "--regions",
+            action="store_true",
+            dest="regions",
+            help="Use distances through the region graph of the level instead of Manhattan distances in heuristics.",
+        )
+
+        parser.add_argument(
+            "--symmetry",
+            action="store_true",
+            dest="symmetry",
+            help="Treat states that only differ by a permutation of same-colored agents without goals as duplicates.",
+        )
+
+        parser.add_argument(
+            "--optimize-plan",
+            action="store_true",
+            dest="optimize_plan",
+            help="Shorten the found plan by removing loops, re-planning short windows, and parallelizing actions.",
+        )
+
+        parser.add_argument(
+            "--checkpoint",
+            metavar="<file>",
+            default=None,
+            help="Periodically save the explored and frontier states of the search to this file, and resume from it if"
+            " it exists. The strategy may differ from the one that saved it.",
+        )
+        parser.add_argument(
+            "--checkpoint-interval",
+            metavar="<s>",
+            dest="checkpoint_interval",
+            type=float,
+            default=60.0,
+            help="The number of seconds between checkpoints (default 60).",
+        )
+
+        parser.add_argument(
+            "--realtime",
+            metavar="<N>",
+            nargs="?",
+            type=int,
+            default=None,
+            const=1000,
+            help="Interleave planning and acting: repeatedly look ahead N generated states (default 1000), learn"
+            " h-values, and send the next joint action right away. The heuristic of the selected strategy is used.",
+        )
+
+        parser.add_argument(
+            "--time-limit",
+            metavar="<s>",
+            type=float,
+            default=inf,
+            help="The time in seconds available for search and sending the plan. Search switches to cheaper strategies"
+            " as the limit approaches and returns the best partial plan if it runs out (default unlimited).",
+        )
+
+        parser.add_argument(
+            "--max-replans",
+            metavar="<N>",
+            type=int,
+            default=3,
+            help="The number of times to re-plan when the server reports a failed action (default 3).",
+        )
+        return parser
+
+    @staticmethod
+    def configure(args: argparse.Namespace) -> None:
+        # Set max memory usage allowed (soft limit).
+        memory.max_usage = args.max_memory
+
+        # Set the wall-clock time limit for search and plan output.
+        budget.time_limit = args.time_limit
 
 
 if __name__ == "__main__":
     # Program arguments.
-    parser = argparse.ArgumentParser(description="Simple client based on state-space graph search.")
-    parser.add_argument(
-        "--max-memory",
-        metavar="<MB>",
-        type=float,
-        default=2048.0,
-        help="The maximum memory usage allowed in MB (soft limit, default 2048).",
-    )
-
-    strategy_group = parser.add_mutually_exclusive_group()
-    strategy_group.add_argument("-bfs", action="store_true", dest="bfs", help="Use the BFS strategy.")
-    strategy_group.add_argument("-dfs", action="store_true", dest="dfs", help="Use the DFS strategy.")
-    strategy_group.add_argument("-astar", action="store_true", dest="astar", help="Use the A* strategy.")
-    strategy_group.add_argument(
-        "-wastar",
-        action="store",
-        dest="wastar",
-        nargs="?",
-        type=int,
-        default=False,
-        const=5,
-        help="Use the WA* strategy.",
-    )
-    strategy_group.add_argument("-greedy", action="store_true", dest="greedy", help="Use the Greedy strategy.")
-
-    args = parser.parse_args()
-
-    # Set max memory usage allowed (soft limit).
-    memory.max_usage = args.max_memory
+    args = SearchClient.build_parser().parse_args()
+    SearchClient.configure(args)
 
     # Run client.
     SearchClient.main(args)
@@ -0,0 +1,203 @@
+import argparse
+import io
+import json
+import os
+import socketserver
+import stat
+import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TextIO
+
+from searchclient import budget, memory
+from searchclient.heuristic import Heuristic
+from searchclient.landmarks import GoalOrdering
+from searchclient.regions import RegionMap
+from searchclient.searchclient import SearchClient
+from searchclient.state import State
+from searchclient.symmetry import AgentSymmetry
+
+# Region maps of the maps a worker has seen, by their walls. They only depend on the walls, so jobs on the same map
+# reuse them, including the distances cached inside them.
+_region_maps: dict[tuple[tuple[bool, ...], ...], RegionMap] = {}
+
+
+def _warm_up() -> None:
+    # Creates the process handle of the worker, so the first job does not pay for it.
+    memory.get_usage()
+
+
+def _solve(args: argparse.Namespace, level: str) -> dict:
+    """Solves a level text in a worker process and returns the plan and stats of the job."""
+    budget.restart()
+    SearchClient.configure(args)
+    initial_state = SearchClient.parse_level(io.StringIO(level))
+
+    Heuristic.region_map = None
+    if args.regions:
+        walls = tuple(tuple(row) for row in State.walls)
+        if walls not in _region_maps:
+            _region_maps[walls] = RegionMap()
+        Heuristic.region_map = _region_maps[walls]
+    goal_ordering = GoalOrdering(initial_state) if args.prune_goal_order else None
+    symmetry = AgentSymmetry(initial_state) if args.symmetry else None
+    if symmetry is not None and symmetry.is_trivial():
+        symmetry = None
+
+    plan = SearchClient.find_plan(args, initial_state, goal_ordering, symmetry)
+    stats = {"time": round(budget.elapsed(), 3), "memory": round(memory.get_usage(), 2)}
+    if plan is None:
+        return {"status": "unsolved", "stats": stats}
+
+    state = initial_state
+    for joint_action in plan:
+        state = state.result(joint_action)
+    stats["length"] = len(plan)
+    return {
+        "status": "solved" if state.is_goal_state() else "partial",
+        "plan": ["|".join(action.name_ for action in joint_action) for joint_action in plan],
+        "stats": stats,
+    }
+
+
+class SolverService:
+    def __init__(self, workers: int) -> None:
+        """
+        Solves levels in a pool of warm worker processes, so a job does not pay for starting Python, importing
+        the client and building the region map of a map that the worker has seen before.
+
+        Jobs are JSON objects on single lines: {"id": ..., "level": "<level text>", "args": [...]}, where args
+        are the program arguments of the client, including the per-job --max-memory and --time-limit. For every
+        job, one JSON line with its id, status (solved, partial, unsolved or error), plan and stats is written
+        back as soon as the job is done, so the responses of a stream can come in a different order.
+
+        The limits of a job are only checked by the search itself, so a worker can still die, e.g. when it is
+        killed for running out of memory. Its job is answered with an error, and the pool is started again.
+        """
+        self.parser = SearchClient.build_parser()
+        self.workers = workers
+        self.executor_lock = threading.Lock()
+        self.executor = self._start_executor()
+
+    def _start_executor(self) -> ProcessPoolExecutor:
+        executor = ProcessPoolExecutor(max_workers=self.workers)
+        for future in [executor.submit(_warm_up) for _ in range(self.workers)]:
+            future.result()
+        return executor
+
+    def _submit(self, args: argparse.Namespace, level: str) -> Future:
+        with self.executor_lock:
+            try:
+                return self.executor.submit(_solve, args, level)
+            except BrokenProcessPool:
+                print("A worker died, restarting the worker pool.", file=sys.stderr, flush=True)
+                self.executor.shutdown(wait=False)
+                self.executor = self._start_executor()
+                return self.executor.submit(_solve, args, level)
+
+    def serve(self, requests: TextIO, responses: TextIO) -> None:
+        """Reads jobs until the end of the request stream, and returns when all of their responses are written."""
+        lock = threading.Lock()
+        answered = threading.Semaphore(0)
+        submitted = 0
+
+        def respond(job_id: object, response: dict) -> None:
+            with lock:
+                responses.write(json.dumps({"id": job_id, **response}) + "\n")
+                responses.flush()
+
+        def on_done(job_id: object, future: Future) -> None:
+            try:
+                respond(job_id, future.result())
+            except Exception as error:
+                respond(job_id, {"status": "error", "error": repr(error)})
+            finally:
+                # Also when the client is gone and the response cannot be written, so serve() does not block.
+                answered.release()
+
+        for line in requests:
+            if not line.strip():
+                continue
+            job_id = None
+            try:
+                job = json.loads(line)
+                job_id = job.get("id")
+                level = job["level"]
+                args = self.parser.parse_args(job.get("args", []))
+            except (ValueError, AttributeError, KeyError, SystemExit) as error:
+                # argparse exits on invalid arguments, after printing the reason to stderr.
+                respond(job_id, {"status": "error", "error": f"invalid job: {error!r}"})
+                continue
+            try:
+                future = self._submit(args, level)
+            except BrokenProcessPool as error:
+                respond(job_id, {"status": "error", "error": repr(error)})
+                continue
+            future.add_done_callback(lambda future, job_id=job_id: on_done(job_id, future))
+            submitted += 1
+
+        for _ in range(submitted):
+            answered.acquire()
+
+    def shutdown(self) -> None:
+        with self.executor_lock:
+            self.executor.shutdown()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        requests = io.TextIOWrapper(self.rfile, encoding="utf-8")
+        responses = io.TextIOWrapper(self.wfile, encoding="utf-8", write_through=True)
+        self.server.service.serve(requests, responses)
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, service: SolverService) -> None:
+        super().__init__(path, _Handler)
+        self.service = service
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Long-running service that solves levels in warm worker processes.")
+    parser.add_argument(
+        "--socket",
+        metavar="<path>",
+        default=None,
+        help="Accept connections on this Unix socket. Without it, jobs are read from stdin and answered on stdout.",
+    )
+    parser.add_argument(
+        "--workers",
+        metavar="<N>",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="The number of worker processes (default: the number of cores).",
+    )
+    service_args = parser.parse_args()
+
+    start = time.perf_counter()
+    service = SolverService(service_args.workers)
+    print(
+        f"Started {service_args.workers} workers in {time.perf_counter() - start:.3f} s.", file=sys.stderr, flush=True
+    )
+    try:
+        if service_args.socket is None:
+            service.serve(sys.stdin, sys.stdout)
+        else:
+            # Remove the socket of a previous run, which is left behind when the service is killed.
+            if os.path.exists(service_args.socket) and stat.S_ISSOCK(os.stat(service_args.socket).st_mode):
+                os.remove(service_args.socket)
+            with _Server(service_args.socket, service) as server:
+                print(f"Listening on {service_args.socket}.", file=sys.stderr, flush=True)
+                server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
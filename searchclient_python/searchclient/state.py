@@ -12,6 +12,8 @@ class State:
     walls: ClassVar[list[list[bool]]]
     box_colors: ClassVar[list[Color | None]]
     goals: ClassVar[list[list[str]]]
+    # Agents that may only perform NoOp, e.g. while solving a subproblem for other agents.
+    frozen_agents: ClassVar[frozenset[int]] = frozenset()
 
     def __init__(self, agent_rows: list[int], agent_cols: list[int], boxes: list[list[str]]) -> None:
         """
@@ -104,7 +106,10 @@ class State:
 
         # Determine list of applicable action for each individual agent.
         applicable_actions = [
-            [action for action in Action if self.is_applicable(agent, action)] for agent in range(num_agents)
+            [action for action in Action if self.is_applicable(agent, action)]
+            if agent not in State.frozen_agents
+            else [Action.NoOp]
+            for agent in range(num_agents)
         ]
 
         # Iterate over joint actions, check conflict and generate child states.
@@ -214,6 +219,18 @@ class State:
                 box_rows[agent] = agent_row  # Distinct dummy value.
                 box_cols[agent] = agent_col  # Distinct dummy value.
 
+            elif action.type is ActionType.Push:
+                box_rows[agent] = agent_row + action.agent_row_delta
+                box_cols[agent] = agent_col + action.agent_col_delta
+                destination_rows[agent] = box_rows[agent] + action.box_row_delta
+                destination_cols[agent] = box_cols[agent] + action.box_col_delta
+
+            elif action.type is ActionType.Pull:
+                destination_rows[agent] = agent_row + action.agent_row_delta
+                destination_cols[agent] = agent_col + action.agent_col_delta
+                box_rows[agent] = agent_row - action.box_row_delta
+                box_cols[agent] = agent_col - action.box_col_delta
+
         for a1 in range(num_agents):
             if joint_action[a1] is Action.NoOp:
                 continue
@@ -226,6 +243,10 @@ class State:
                 if destination_rows[a1] == destination_rows[a2] and destination_cols[a1] == destination_cols[a2]:
                     return True
 
+                # Moving same box?
+                if box_rows[a1] == box_rows[a2] and box_cols[a1] == box_cols[a2]:
+                    return True
+
         return False
 
     def is_free(self, row: int, col: int) -> bool:
@@ -239,6 +260,20 @@ class State:
                 return chr(agent + ord("0"))
         return None
 
+    def detached(self) -> "State":
+        """Returns this state without parent, as the root of a new search whose plan starts from it."""
+        return State(self.agent_rows, self.agent_cols, self.boxes)
+
+    @staticmethod
+    def free_neighbours(row: int, col: int) -> list[tuple[int, int]]:
+        """Returns the cells next to (row, col) that are not walls."""
+        neighbours = []
+        for d_row, d_col in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+            n_row, n_col = row + d_row, col + d_col
+            if 0 <= n_row < len(State.walls) and 0 <= n_col < len(State.walls[n_row]) and not State.walls[n_row][n_col]:
+                neighbours.append((n_row, n_col))
+        return neighbours
+
     def extract_plan(self) -> list[list[Action]]:
         plan = []
         state: State | None = self
@@ -0,0 +1,145 @@
+import sys
+from collections.abc import Callable
+from math import inf
+
+from searchclient import budget
+from searchclient.action import Action
+from searchclient.frontier import Frontier
+from searchclient.graphsearch import best_partial_state, search
+from searchclient.heuristic import Heuristic
+from searchclient.landmarks import GoalOrdering
+from searchclient.state import State
+from searchclient.symmetry import AgentSymmetry
+
+# Subproblems that only let some of the agents move give up after this many expansions, since they
+# are often unsolvable when a frozen agent is in the way.
+MAX_RESTRICTED_EXPANDED = 5000
+
+
+def subgoal_sequence(initial_state: State) -> list[tuple[int, int]]:
+    """
+    Returns the goal cells in the order they should be solved: box goals first, following the goal
+    ordering layers of the level, and agent goals last.
+    """
+    sequence = [goal for layer in GoalOrdering(initial_state).layers for goal in layer]
+    for row in range(len(State.goals)):
+        for col in range(len(State.goals[row])):
+            if "0" <= State.goals[row][col] <= "9":
+                sequence.append((row, col))
+    return sequence
+
+
+def responsible_agents(state: State, row: int, col: int, goal: str) -> list[frozenset[int]]:
+    """
+    Returns the sets of agents to try for achieving the goal at (row, col), smallest first: the agent that is
+    closest to the closest box for the goal, all agents of the box color, and finally all agents. An agent
+    standing on the goal cell is always allowed to move out of the way.
+    """
+    num_agents = len(state.agent_rows)
+    if "0" <= goal <= "9":
+        return [frozenset([ord(goal) - ord("0")]), frozenset(range(num_agents))]
+
+    box_color = State.box_colors[ord(goal) - ord("A")]
+    colored = [agent for agent in range(num_agents) if State.agent_colors[agent] == box_color]
+    boxes = [
+        (box_row, box_col)
+        for box_row in range(len(state.boxes))
+        for box_col in range(len(state.boxes[box_row]))
+        if state.boxes[box_row][box_col] == goal and State.goals[box_row][box_col] != goal
+    ]
+    blocking = frozenset(
+        agent for agent in range(num_agents) if state.agent_rows[agent] == row and state.agent_cols[agent] == col
+    )
+    tiers = []
+    if colored and boxes:
+        box_row, box_col = min(boxes, key=lambda box: Heuristic.distance(row, col, box[0], box[1]))
+        closest = min(
+            colored,
+            key=lambda agent: Heuristic.distance(box_row, box_col, state.agent_rows[agent], state.agent_cols[agent]),
+        )
+        tiers.append(frozenset([closest]) | blocking)
+    if len(colored) > 1:
+        tiers.append(frozenset(colored) | blocking)
+    tiers.append(frozenset(range(num_agents)))
+    return list(dict.fromkeys(tiers))
+
+
+def _partial_plan(plan: list[list[Action]]) -> list[list[Action]]:
+    # The plan so far, followed by the plan to the most promising state of the last subproblem, which is rooted
+    # at the end state of the plan so far.
+    print("Subgoal search gave up, returning a partial plan.", file=sys.stderr, flush=True)
+    best_state = best_partial_state()
+    return plan if best_state is None else plan + best_state.extract_plan()
+
+
+def _is_satisfied(state: State, row: int, col: int, goal: str) -> bool:
+    if "A" <= goal <= "Z":
+        return state.boxes[row][col] == goal
+    agent = ord(goal) - ord("0")
+    return state.agent_rows[agent] == row and state.agent_cols[agent] == col
+
+
+def search_subgoals(
+    initial_state: State,
+    make_frontier: Callable[[State], Frontier],
+    goal_ordering: GoalOrdering | None = None,
+    symmetry: AgentSymmetry | None = None,
+) -> list[list[Action]] | None:
+    """
+    Solves the level as an ordered sequence of subproblems, one goal at a time. Each subproblem starts
+    from the end state of the previous one, requires all goals solved so far to stay solved, and only lets
+    the agents responsible for the new goal move. If a subproblem fails even with all agents moving, the
+    remaining goals are solved by a joint search. When the time limit is reached, or the joint search fails
+    under a time limit, the plan to the most promising state found so far is returned instead.
+    """
+    num_agents = len(initial_state.agent_rows)
+    full_goals = State.goals
+    partial_goals = [["" for _ in row] for row in full_goals]
+    plan: list[list[Action]] = []
+    state = initial_state.detached()
+
+    try:
+        Heuristic.count_approach = True
+        for row, col in subgoal_sequence(initial_state):
+            goal = full_goals[row][col]
+            partial_goals[row][col] = goal
+            if _is_satisfied(state, row, col, goal):
+                continue
+
+            print(f"Solving subgoal {goal} at ({row}, {col}).", file=sys.stderr, flush=True)
+            State.goals = [goal_row[:] for goal_row in partial_goals]
+            sub_plan = None
+            for agents in responsible_agents(state, row, col, goal):
+                State.frozen_agents = frozenset(range(num_agents)) - agents
+                state = state.detached()
+                max_expanded = MAX_RESTRICTED_EXPANDED if State.frozen_agents else None
+                sub_plan = search(state, make_frontier(state), goal_ordering, max_expanded, symmetry)
+                if sub_plan is not None:
+                    break
+                if budget.used():
+                    return _partial_plan(plan)
+                print("Subgoal failed, retrying with more agents.", file=sys.stderr, flush=True)
+            if sub_plan is None:
+                break
+
+            for joint_action in sub_plan:
+                state = state.result(joint_action)
+            state = state.detached()
+            plan.extend(sub_plan)
+        else:
+            return plan
+
+        # Fall back to a joint search for all goals from the last subproblem's end state.
+        print("Subgoal failed, falling back to joint search.", file=sys.stderr, flush=True)
+        State.goals = full_goals
+        State.frozen_agents = frozenset()
+        Heuristic.count_approach = False
+        state = state.detached()
+        rest = search(state, make_frontier(state), goal_ordering, symmetry=symmetry)
+        if rest is None and budget.time_limit < inf:
+            return _partial_plan(plan)
+        return None if rest is None else plan + rest
+    finally:
+        State.goals = full_goals
+        State.frozen_agents = frozenset()
+        Heuristic.count_approach = False
@@ -0,0 +1,43 @@
+from collections.abc import Hashable
+
+from searchclient.state import State
+
+
+class AgentSymmetry:
+    def __init__(self, initial_state: State) -> None:
+        """
+        Finds the groups of interchangeable agents: agents of the same color without agent goals can do
+        exactly the same things, so states that only differ by a permutation of such agents are equivalent.
+
+        Boxes of the same letter are already interchangeable, since State.boxes only stores letters.
+        """
+        num_agents = len(initial_state.agent_rows)
+        has_goal = [False for _ in range(num_agents)]
+        for row in State.goals:
+            for goal in row:
+                if "0" <= goal <= "9" and ord(goal) - ord("0") < num_agents:
+                    has_goal[ord(goal) - ord("0")] = True
+
+        groups: dict[object, list[int]] = {}
+        for agent in range(num_agents):
+            if not has_goal[agent]:
+                groups.setdefault(State.agent_colors[agent], []).append(agent)
+        self.groups = [group for group in groups.values() if len(group) > 1]
+
+    def key(self, state: State) -> Hashable:
+        """
+        Returns a canonical key for the state: the positions of every group of interchangeable agents are
+        sorted, so all permutations of those agents map to the same key. Frozen agents keep their identity.
+        """
+        positions = list(zip(state.agent_rows, state.agent_cols))
+        for group in self.groups:
+            members = [agent for agent in group if agent not in State.frozen_agents]
+            for agent, position in zip(members, sorted(positions[agent] for agent in members)):
+                positions[agent] = position
+        return tuple(positions), tuple(tuple(row) for row in state.boxes)
+
+    def is_trivial(self) -> bool:
+        return not self.groups
+
+    def __repr__(self) -> str:
+        return f"agent symmetry groups {self.groups}"
@@ -0,0 +1,146 @@
+import queue
+import threading
+from typing import TextIO
+
+from searchclient.action import Action
+from searchclient.state import State
+
+
+class PlanTransmitter:
+    def __init__(self, out: TextIO, server_messages: TextIO, batch_size: int = 32, max_in_flight: int = 128) -> None:
+        """
+        Sends joint actions to the server without waiting for the response to each one.
+
+        A writer thread writes the submitted actions in batches, flushing once per batch, while a reader
+        thread consumes the server's responses concurrently. At most max_in_flight actions are written ahead
+        of the responses. When the server reports a failed action, the actions that were not written yet are
+        discarded, so the caller can re-plan from the actual state.
+        The streams are only used through write/flush/readline, so any pair of streams (e.g. pipes to a
+        local stand-in for the server) can be used.
+        """
+        self.out = out
+        self.server_messages = server_messages
+        self.batch_size = batch_size
+        self.max_in_flight = max(max_in_flight, batch_size)
+
+        # Responses of the server, one list of per-agent results for every action it executed.
+        self.responses: list[list[bool]] = []
+        self.failed = threading.Event()
+
+        self._pending: queue.Queue[list[Action] | None] = queue.Queue()
+        self._outstanding = threading.Semaphore(0)
+        self._changed = threading.Condition()
+        self._submitted = 0
+        self._sent = 0
+        self._received = 0
+        self._finished = 0
+        self._eof = False
+        self._closing = False
+
+        self._writer = threading.Thread(target=self._write, daemon=True)
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._writer.start()
+        self._reader.start()
+
+    @property
+    def server_closed(self) -> bool:
+        return self._eof
+
+    def submit(self, joint_action: list[Action]) -> None:
+        with self._changed:
+            self._submitted += 1
+        self._pending.put(joint_action)
+
+    def wait(self) -> None:
+        """Blocks until every submitted action was either answered by the server or discarded."""
+        with self._changed:
+            self._changed.wait_for(lambda: self._finished == self._submitted)
+
+    def send(self, plan: list[list[Action]]) -> list[list[bool]]:
+        """
+        Sends a plan and returns the server's responses for the actions it executed. If there are fewer
+        responses than actions, or some response contains a failure, the plan was not fully executed.
+        """
+        self.failed.clear()
+        start = len(self.responses)
+        for joint_action in plan:
+            self.submit(joint_action)
+        self.wait()
+        return self.responses[start:]
+
+    def close(self) -> None:
+        self._pending.put(None)
+        self._writer.join()
+        with self._changed:
+            self._closing = True
+        self._outstanding.release()
+        self._reader.join()
+
+    def _finish(self, count: int) -> None:
+        with self._changed:
+            self._finished += count
+            self._changed.notify_all()
+
+    def _write(self) -> None:
+        while True:
+            batch = [self._pending.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+
+            closing = None in batch
+            actions = [joint_action for joint_action in batch if joint_action is not None]
+            with self._changed:
+                self._changed.wait_for(
+                    lambda: self._sent - self._received + len(actions) <= self.max_in_flight or self.failed.is_set()
+                )
+            if self.failed.is_set() or self._eof:
+                # The server's state differs from the plan, so the remaining actions are useless.
+                self._finish(len(actions))
+            elif actions:
+                self.out.write("".join("|".join(a.name_ for a in joint_action) + "\n" for joint_action in actions))
+                self.out.flush()
+                with self._changed:
+                    self._sent += len(actions)
+                for _ in actions:
+                    self._outstanding.release()
+
+            if closing:
+                return
+
+    def _read(self) -> None:
+        while True:
+            self._outstanding.acquire()
+            with self._changed:
+                if self._closing and self._received == self._sent:
+                    return
+                self._received += 1
+            if self._eof:
+                self._finish(1)
+                continue
+
+            line = self.server_messages.readline()
+            if not line:
+                # The server has closed the connection.
+                self._eof = True
+                self.failed.set()
+                self._finish(1)
+                continue
+
+            response = [result.strip() == "true" for result in line.split("|")]
+            self.responses.append(response)
+            if not all(response):
+                self.failed.set()
+            self._finish(1)
+
+
+def apply_responses(state: State, plan: list[list[Action]], responses: list[list[bool]]) -> State:
+    """
+    Returns the state the server is in after executing the start of the plan, where the actions that the
+    server reported as failed had no effect.
+    """
+    for joint_action, response in zip(plan, responses):
+        state = state.result([action if ok else Action.NoOp for action, ok in zip(joint_action, response)])
+    return state.detached()